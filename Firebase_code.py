@@ -1,160 +1,907 @@
 # firebase_banking.py
-import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import uuid
-import hashlib
+# streamlit, firebase_admin and google.api_core are imported by the backends
+# that need them: together they cost about a second of cold-start time.
+import copy
 import logging
+import hashlib
 from datetime import datetime, timezone, timedelta
 import re
 import json
 import os
+import random
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import memory_store
+from account_cache import AccountCache
+from account_view import AccountView
+from account_numbers import AccountNumberAllocator, is_plausible_account_no
+from passwords import PasswordHasher
+from transaction_cache import TransactionCache
+from metrics import CountingClient, Metrics, instrumented, submit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Firestore's limit on writes in one batch or transaction
+WRITE_LIMIT = 500
+# Documents requested per get_all call
+READ_BATCH_SIZE = 500
+# Account fields safe to hand to views and reports: never the password hash
+ACCOUNT_FIELDS = ("name", "email", "balance", "created_at")
+# Ledger entry fields the history views, analytics and rollups use
+HISTORY_FIELDS = ("transaction_type", "amount", "category", "recipient_account", "timestamp")
+# Loan fields the loans tab shows
+LOAN_FIELDS = ("amount", "monthly_payment", "remaining_amount")
+# Attempts at a money movement that carries an idempotency key, and the
+# first backoff delay (seconds, doubled per attempt) on transient errors
+RETRY_ATTEMPTS = 4
+RETRY_DELAY = 0.05
+# A rollup backfill reads entries from the last this many seconds before it
+# started in its final transaction instead of its scan, to catch late commits
+ROLLUP_BACKFILL_OVERLAP = 60
+
+# Adds one ledger entry to a rollup dict, as _update_rollups does with Increments
+def _add_to_rollup(rollup, txn):
+    month = rollup["monthly"].setdefault(txn["timestamp"][:7], {})
+    month[txn["transaction_type"]] = month.get(txn["transaction_type"], 0) + txn["amount"]
+    categories = rollup["categories"].setdefault(txn["transaction_type"], {})
+    categories[txn["category"]] = categories.get(txn["category"], 0) + txn["amount"]
+
+def _check_fingerprint(doc, fingerprint):
+    if doc.get("fingerprint") != fingerprint:
+        raise ValueError("Idempotency key was already used with different arguments")
+
 class BankingSystem:
-    def __init__(self):
-        if not firebase_admin._apps:
-            cred_dict = json.loads(st.secrets["GOOGLE_CREDENTIALS"])
-            cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
-        self.db = firestore.client()
+    # backend is "firestore" (default), "memory" for the in-process store or
+    # "emulator" for a Firestore emulator at FIRESTORE_EMULATOR_HOST; it can
+    # also be chosen with the BANKING_BACKEND environment variable.
+    def __init__(self, backend=None):
+        self.backend = backend or os.environ.get("BANKING_BACKEND", "firestore")
+        if self.backend == "memory":
+            self.firestore = memory_store
+            self.db = memory_store.client()
+            self.already_exists_error = memory_store.AlreadyExists
+            self.transient_errors = (memory_store.ServiceUnavailable, memory_store.DeadlineExceeded)
+        elif self.backend == "emulator":
+            from firebase_admin import firestore
+            from google.api_core.exceptions import (
+                AlreadyExists, DeadlineExceeded, InternalServerError, ServiceUnavailable
+            )
+
+            if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+                raise ValueError("FIRESTORE_EMULATOR_HOST must be set for the emulator backend")
+            self.firestore = firestore
+            self.db = firestore.Client(
+                project=os.environ.get("GOOGLE_CLOUD_PROJECT", "demo-securebank")
+            )
+            self.already_exists_error = AlreadyExists
+            self.transient_errors = (ServiceUnavailable, DeadlineExceeded, InternalServerError)
+        elif self.backend == "firestore":
+            import streamlit as st
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            from google.api_core.exceptions import (
+                AlreadyExists, DeadlineExceeded, InternalServerError, ServiceUnavailable
+            )
+
+            if not firebase_admin._apps:
+                cred_dict = json.loads(st.secrets["GOOGLE_CREDENTIALS"])
+                cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
+                cred = credentials.Certificate(cred_dict)
+                firebase_admin.initialize_app(cred)
+            self.firestore = firestore
+            self.db = firestore.client()
+            self.already_exists_error = AlreadyExists
+            self.transient_errors = (ServiceUnavailable, DeadlineExceeded, InternalServerError)
+        else:
+            raise ValueError(f"Unknown storage backend: {self.backend}")
+
+        # Per-method latency and Firestore usage; BANKING_METRICS=0 turns it off
+        self.metrics = None
+        if os.environ.get("BANKING_METRICS", "1") != "0":
+            self.metrics = Metrics()
+            self.db = CountingClient(self.db)
+            if os.environ.get("BANKING_METRICS_FILE"):
+                atexit.register(self.metrics.write, os.environ["BANKING_METRICS_FILE"])
+
+        self.account_cache = AccountCache(
+            maxsize=int(os.environ.get("BANKING_ACCOUNT_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("BANKING_ACCOUNT_CACHE_TTL", 30))
+        )
+        self.account_numbers = AccountNumberAllocator(self.db, self.firestore)
+        self.password_hasher = PasswordHasher()
+
+        # Optional on-disk history cache, synced incrementally from Firestore
+        self.transaction_cache = None
+        if os.environ.get("BANKING_TRANSACTION_CACHE"):
+            self.transaction_cache = TransactionCache(
+                os.environ["BANKING_TRANSACTION_CACHE"],
+                overlap=float(os.environ.get("BANKING_TRANSACTION_CACHE_OVERLAP", 60))
+            )
+
+        # Optional live views of logged-in accounts, fed by on_snapshot
+        # listeners instead of reads on every rerun (BANKING_LISTENERS=1)
+        self.listeners = os.environ.get("BANKING_LISTENERS", "0") == "1"
+        self.listener_idle = float(os.environ.get("BANKING_LISTENER_IDLE", 600))
+        self.account_views = {}
+        self._views_lock = threading.Lock()
 
     def validate_email(self, email):
         pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         return re.match(pattern, email)
 
+    @instrumented
     def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
+        return self.password_hasher.hash(password)
+
+    def normalize_email(self, email):
+        return email.strip().lower()
 
+    @instrumented
     def create_account(self, name, password, email):
         if not self.validate_email(email):
             raise ValueError("Invalid email format")
 
         hashed_pw = self.hash_password(password)
+        email_ref = self.db.collection("emails").document(self.normalize_email(email))
 
-        # Check if email exists
-        users = self.db.collection("accounts").where("email", "==", email).stream()
-        if any(users):
-            raise ValueError("Email already registered")
-
-        account_no = str(uuid.uuid4())[:8].upper()
-        self.db.collection("accounts").document(account_no).set({
-            "name": name,
-            "password": hashed_pw,
-            "email": email,
-            "balance": 0.0,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        })
-        return account_no
-    
+        # The emails/{email} index document makes uniqueness a document-ID
+        # collision: account, index and rollup are created in one commit that
+        # fails with AlreadyExists instead of querying for the email first.
+        for _ in range(3):
+            account_no = self.account_numbers.allocate()
+            batch = self.db.batch()
+            batch.create(email_ref, {"account_no": account_no})
+            batch.create(self.db.collection("accounts").document(account_no), {
+                "name": name,
+                "password": hashed_pw,
+                "email": email,
+                "balance": 0.0,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
+            # New accounts have no history to backfill
+            batch.set(self.db.collection("rollups").document(account_no), {"backfilled": True})
+            try:
+                batch.commit()
+                return account_no
+            except self.already_exists_error:
+                if email_ref.get().exists:
+                    raise ValueError("Email already registered")
+                # Otherwise the account number was taken; try another one
+        raise ValueError("Could not allocate an account number, please try again")
+
+    # One-off migration for accounts created before the emails index existed
+    @instrumented
+    def rebuild_email_index(self):
+        for account in self.db.collection("accounts").select(["email"]).stream():
+            email = account.to_dict().get("email")
+            if email:
+                self.db.collection("emails").document(self.normalize_email(email)).set(
+                    {"account_no": account.id}
+                )
+
+    # Starts (or reuses) the live view of an account. A view is shared by every
+    # session of the account, so views are not closed at logout: those nobody
+    # has read for listener_idle seconds are closed here instead.
+    def watch_account(self, account_no, history_size=50):
+        with self._views_lock:
+            now = time.monotonic()
+            for other, view in list(self.account_views.items()):
+                if now - view.last_used > self.listener_idle:
+                    view.close()
+                    del self.account_views[other]
+            view = self.account_views.get(account_no)
+            if view is None:
+                view = AccountView(
+                    self.db.collection("accounts").document(account_no),
+                    self._history_query(account_no, fields=None),
+                    history_size,
+                    ACCOUNT_FIELDS
+                )
+                self.account_views[account_no] = view
+            view.last_used = now
+            return view
+
+    # Closes the view for every session of the account
+    def unwatch_account(self, account_no):
+        with self._views_lock:
+            view = self.account_views.pop(account_no, None)
+        if view is not None:
+            view.close()
+
+    def _invalidate_accounts(self, *account_nos):
+        self.account_cache.invalidate(*account_nos)
+        for account_no in account_nos:
+            view = self.account_views.get(account_no)
+            if view is not None:
+                view.mark_stale()
+
+    # The account's ACCOUNT_FIELDS from its live view or the cache, else None
+    def _cached_account(self, account_no):
+        view = self.account_views.get(account_no)
+        if view is not None:
+            account = view.get_account()
+            if account is not None:
+                return account
+        return self.account_cache.get(account_no)
+
+    # Read-through lookup of an account's ACCOUNT_FIELDS. Write paths invalidate
+    # the entries they touch; the TTL bounds staleness from writes made elsewhere.
+    def _get_account(self, account_no):
+        account = self._cached_account(account_no)
+        if account is None:
+            doc = self.db.collection("accounts").document(account_no).get(
+                field_paths=list(ACCOUNT_FIELDS)
+            )
+            if not doc.exists:
+                return None
+            account = doc.to_dict()
+            self.account_cache.put(account_no, account)
+        return account
+
+    # The only read of the password hash. It is never cached; the rest of the
+    # document is, as the dashboard reads it right after login.
+    @instrumented
     def validate_login(self, account_no, password):
-        hashed_pw = self.hash_password(password)
-        doc = self.db.collection("accounts").document(account_no).get()
-        if doc.exists and doc.to_dict()["password"] == hashed_pw:
-            user = doc.to_dict()
-            return account_no, user["name"], user["email"], user["balance"]
-        return None
+        doc = self.db.collection("accounts").document(account_no).get(
+            field_paths=["password", *ACCOUNT_FIELDS]
+        )
+        if not doc.exists:
+            return None
+        user = doc.to_dict()
+        password_hash = user.pop("password", None)
+        self.account_cache.put(account_no, user)
+        if not password_hash:
+            return None
+        matches, needs_rehash = self.password_hasher.verify(password, password_hash)
+        if not matches:
+            return None
+        if needs_rehash:
+            self._upgrade_password(account_no, password)
+        return account_no, user["name"], user["email"], user["balance"]
+
+    # Re-hashes legacy or outdated hashes with the current settings at login,
+    # the only time the plain password is available.
+    def _upgrade_password(self, account_no, password):
+        try:
+            self.db.collection("accounts").document(account_no).update({
+                "password": self.hash_password(password)
+            })
+        except Exception as e:
+            logger.error(f"Password upgrade failed: {str(e)}")
+        finally:
+            self._invalidate_accounts(account_no)
+
+    # Reads many documents from one collection with batched get_all calls,
+    # fetching only the given fields (all of them if fields is None). Returns
+    # {doc_id: data or None}, in the order of doc_ids.
+    def _get_documents(self, collection, doc_ids, fields):
+        doc_ids = list(dict.fromkeys(doc_ids))
+        documents = dict.fromkeys(doc_ids)
+        refs = self.db.collection(collection)
+        for start in range(0, len(doc_ids), READ_BATCH_SIZE):
+            chunk = [refs.document(doc_id) for doc_id in doc_ids[start:start + READ_BATCH_SIZE]]
+            field_paths = None if fields is None else list(fields)
+            for doc in self.db.get_all(chunk, field_paths=field_paths):
+                if doc.exists:
+                    documents[doc.id] = doc.to_dict()
+        return documents
+
+    # Several accounts in one round trip per READ_BATCH_SIZE accounts, e.g.
+    # for recipient checks and reports. Missing accounts map to None.
+    @instrumented
+    def get_accounts(self, account_nos, fields=ACCOUNT_FIELDS):
+        try:
+            return self._get_documents("accounts", account_nos, fields)
+        except Exception as e:
+            logger.error(f"Error fetching accounts: {str(e)}")
+            return {}
+
+    # Loans by id, like get_accounts; fields=None fetches every field
+    @instrumented
+    def get_loans(self, loan_ids, fields=None):
+        try:
+            loans = self._get_documents("loans", loan_ids, fields)
+            for loan_id, loan in loans.items():
+                if loan is not None:
+                    loan["loan_id"] = loan_id
+            return loans
+        except Exception as e:
+            logger.error(f"Error fetching loans: {str(e)}")
+            return {}
 
+    @instrumented
     def get_user_details(self, account_no):
-        doc = self.db.collection("accounts").document(account_no).get()
-        if doc.exists:
-            data = doc.to_dict()
+        data = self._get_account(account_no)
+        if data:
             return data["name"], data["email"], data["balance"], data["created_at"]
         return None
 
+    @instrumented
     def get_balance(self, account_no):
-        doc = self.db.collection("accounts").document(account_no).get()
-        if doc.exists:
-            return doc.to_dict().get("balance", 0.0)
+        data = self._cached_account(account_no)
+        if data is None:
+            doc = self.db.collection("accounts").document(account_no).get(field_paths=["balance"])
+            data = doc.to_dict() if doc.exists else None
+        if data:
+            return data.get("balance", 0.0)
         return 0.0
 
-    def record_transaction(self, account_no, txn_type, amount, category, recipient=None):
-        try:
-            account_ref = self.db.collection("accounts").document(account_no)
-            account = account_ref.get().to_dict()
-            balance = account.get("balance", 0.0)
+    # Money movements accept an idempotency key, e.g. one per form submission.
+    # The first call that commits stores its result in the same commit as its
+    # ledger entries; later calls with the key return that result without
+    # applying the movement again. Records are keyed by a hash of the
+    # operation, the account (or loan) and the key, so callers cannot see each
+    # other's results, and hold a fingerprint of the other arguments: reusing
+    # a key for a different movement is an error. Returns (ref, operation,
+    # fingerprint), or None without a key.
+    def _idempotency_record(self, idempotency_key, operation, scope, *args, collection="idempotency"):
+        if idempotency_key is None:
+            return None
+        doc_id = hashlib.sha256(json.dumps([operation, scope, idempotency_key]).encode()).hexdigest()
+        fingerprint = hashlib.sha256(json.dumps(args, default=str).encode()).hexdigest()
+        return self.db.collection(collection).document(doc_id), operation, fingerprint
 
-            if txn_type == "withdraw" and amount > balance:
-                return False
+    # The result stored for the key, or None if it was not used yet
+    def _stored_result(self, record, transaction=None):
+        if record is None:
+            return None
+        key_ref, _, fingerprint = record
+        doc = key_ref.get(["result", "fingerprint"], transaction=transaction)
+        if not doc.exists:
+            return None
+        _check_fingerprint(doc, fingerprint)
+        result = doc.get("result")
+        return tuple(result) if isinstance(result, list) else result
 
-            new_balance = balance + amount if txn_type == "deposit" else balance - amount
-            account_ref.update({"balance": new_balance})
+    def _store_result(self, writer, record, result):
+        if record is not None:
+            key_ref, operation, fingerprint = record
+            writer.create(key_ref, {
+                "operation": operation,
+                "fingerprint": fingerprint,
+                "result": list(result) if isinstance(result, tuple) else result,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
 
-            txn = {
-                "account_no": account_no,
-                "transaction_type": txn_type,
-                "amount": amount,
-                "category": category,
-                "recipient_account": recipient,
-                "timestamp": datetime.utcnow().isoformat()
-            }
+    # Calls operation(), retrying transient errors when there is an idempotency
+    # key: if a commit went through but its response was lost, the retry finds
+    # the stored result. Without a key a retry could apply the movement twice.
+    def _with_retries(self, idempotency_key, operation):
+        attempts = RETRY_ATTEMPTS if idempotency_key is not None else 1
+        for attempt in range(attempts):
+            try:
+                return operation()
+            except self.transient_errors as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Retrying after transient error: {str(e)}")
+                time.sleep(RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.0))
+
+    @instrumented
+    def record_transaction(self, account_no, txn_type, amount, category, recipient=None,
+                           idempotency_key=None):
+        account_ref = self.db.collection("accounts").document(account_no)
+        record = self._idempotency_record(
+            idempotency_key, txn_type, account_no, amount, category, recipient
+        )
+        txn_ref = self.db.collection("transactions").document()
+        txn = {
+            "account_no": account_no,
+            "transaction_type": txn_type,
+            "amount": amount,
+            "category": category,
+            "recipient_account": recipient,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+        # Withdrawals must see the current balance, so they run as a transaction
+        @self.firestore.transactional
+        def withdraw(transaction):
+            stored = self._stored_result(record, transaction)
+            if stored is not None:
+                return stored
+            balance = account_ref.get(["balance"], transaction=transaction).get("balance")
+            if amount > balance:
+                return False
+            transaction.update(account_ref, {"balance": balance - amount})
+            transaction.set(txn_ref, txn)
+            self._update_rollup(transaction, txn)
+            self._store_result(transaction, record, True)
+            return True
 
-            self.db.collection("transactions").add(txn)
+        # Deposits cannot fail a balance check: one blind batched write. A
+        # reused key makes the commit fail on creating its record.
+        def deposit():
+            batch = self.db.batch()
+            batch.update(account_ref, {"balance": self.firestore.Increment(amount)})
+            batch.set(txn_ref, txn)
+            self._update_rollup(batch, txn)
+            self._store_result(batch, record, True)
+            try:
+                batch.commit()
+            except self.already_exists_error:
+                return self._stored_result(record)
             return True
+
+        try:
+            if txn_type == "deposit":
+                return self._with_retries(idempotency_key, deposit)
+            return self._with_retries(idempotency_key, lambda: withdraw(self.db.transaction()))
         except Exception as e:
             logger.error(f"Transaction failed: {str(e)}")
             return False
+        finally:
+            self._invalidate_accounts(account_no)
+
+    # Records many (account_no, txn_type, amount, category) deposits and
+    # withdrawals at once, e.g. a payroll run. Records are grouped by account
+    # and packed into transactions of at most WRITE_LIMIT writes: one balance
+    # update and one rollup update per account plus a ledger entry per record.
+    # Chunks run on up to max_workers threads; an account's records are applied
+    # in order. Returns a (success, message) pair per record, in input order.
+    # With an idempotency key each chunk stores its outcomes under the key and
+    # its number, so resubmitting the same records applies only the chunks
+    # that did not commit.
+    @instrumented
+    def record_transactions_bulk(self, records, max_workers=4, idempotency_key=None):
+        records = list(records)
+        results = [None] * len(records)
+        by_account = {}
+        for i, record in enumerate(records):
+            try:
+                account_no, txn_type, amount, category = record
+                if not isinstance(account_no, str) or not account_no:
+                    raise ValueError(f"account number must be a non-empty string, got {account_no!r}")
+                if txn_type not in ("deposit", "withdraw"):
+                    raise ValueError(f"unsupported transaction type {txn_type!r}")
+                if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount <= 0:
+                    raise ValueError(f"amount must be a positive number, got {amount!r}")
+            except (TypeError, ValueError) as e:
+                results[i] = (False, f"Invalid record: {str(e)}")
+                continue
+            by_account.setdefault(account_no, []).append(i)
+
+        # Each task is a list of chunks run one after another: accounts with
+        # more records than fit one chunk get a task of their own. One write
+        # per chunk is left for its idempotency record.
+        capacity = WRITE_LIMIT - 1
+        per_chunk = capacity - 2
+        tasks, chunk, chunk_writes = [], [], 0
+        for account_no, indexes in by_account.items():
+            if len(indexes) > per_chunk:
+                tasks.append([[(account_no, indexes[i:i + per_chunk])]
+                              for i in range(0, len(indexes), per_chunk)])
+                continue
+            if chunk_writes + len(indexes) + 2 > capacity:
+                tasks.append([chunk])
+                chunk, chunk_writes = [], 0
+            chunk.append((account_no, indexes))
+            chunk_writes += len(indexes) + 2
+        if chunk:
+            tasks.append([chunk])
+
+        # Chunks are numbered in packing order, which only depends on the records
+        numbered, n = [], 0
+        for task in tasks:
+            numbered.append([(n + j, chunk) for j, chunk in enumerate(task)])
+            n += len(task)
+
+        def run(task):
+            for n, chunk in task:
+                key_record = self._idempotency_record(
+                    idempotency_key, "bulk_record", str(n),
+                    [records[i] for _, indexes in chunk for i in indexes]
+                )
+                self._record_chunk(chunk, records, results, key_record)
+
+        with ThreadPoolExecutor(max(1, min(max_workers, len(tasks) or 1))) as pool:
+            for future in [submit(pool, run, task) for task in numbered]:
+                future.result()
+        return results
+
+    def _record_chunk(self, chunk, records, results, key_record=None):
+        order = [i for _, indexes in chunk for i in indexes]
+
+        @self.firestore.transactional
+        def apply(transaction):
+            stored = self._stored_result(key_record, transaction)
+            if stored is not None:
+                return {i: (o["ok"], o["message"]) for i, o in zip(order, stored["outcomes"])}
+            outcomes = {}
+            snapshots = {snapshot.id: snapshot for snapshot in self.db.get_all(
+                account_refs, field_paths=["balance"], transaction=transaction
+            )}
+            for ref, (account_no, indexes) in zip(account_refs, chunk):
+                snapshot = snapshots.get(account_no)
+                if snapshot is None or not snapshot.exists:
+                    outcomes.update((i, (False, "Account not found")) for i in indexes)
+                    continue
+                balance = snapshot.get("balance")
+                txns = []
+                for i in indexes:
+                    _, txn_type, amount, category = records[i]
+                    if txn_type == "withdraw" and amount > balance:
+                        outcomes[i] = (False, "Insufficient funds")
+                        continue
+                    balance += amount if txn_type == "deposit" else -amount
+                    txn = {
+                        "account_no": account_no,
+                        "transaction_type": txn_type,
+                        "amount": amount,
+                        "category": category,
+                        "recipient_account": None,
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    }
+                    transaction.set(self.db.collection("transactions").document(), txn)
+                    txns.append(txn)
+                    outcomes[i] = (True, "Transaction recorded")
+                if txns:
+                    transaction.update(ref, {"balance": balance})
+                    self._update_rollups(transaction, txns)
+            self._store_result(transaction, key_record, {
+                "outcomes": [{"ok": outcomes[i][0], "message": outcomes[i][1]} for i in order]
+            })
+            return outcomes
 
-    def transfer_money(self, from_acc, to_acc, amount):
         try:
-            sender = self.db.collection("accounts").document(from_acc).get()
-            receiver = self.db.collection("accounts").document(to_acc).get()
+            account_refs = [self.db.collection("accounts").document(account_no) for account_no, _ in chunk]
+            outcomes = self._with_retries(key_record, lambda: apply(self.db.transaction()))
+            for i, outcome in outcomes.items():
+                results[i] = outcome
+        except Exception as e:
+            logger.error(f"Bulk transaction chunk failed: {str(e)}")
+            for _, indexes in chunk:
+                for i in indexes:
+                    results[i] = (False, f"Transaction failed: {str(e)}")
+        finally:
+            self._invalidate_accounts(*(account_no for account_no, _ in chunk))
+
+    @instrumented
+    def transfer_money(self, from_acc, to_acc, amount, idempotency_key=None):
+        if from_acc == to_acc:
+            return False, "Cannot transfer to the same account"
+        if not is_plausible_account_no(to_acc):
+            return False, "Recipient account not found"
+
+        accounts = self.db.collection("accounts")
+        transactions = self.db.collection("transactions")
+        sender_ref = accounts.document(from_acc)
+        receiver_ref = accounts.document(to_acc)
+        record = self._idempotency_record(idempotency_key, "transfer", from_acc, to_acc, amount)
+
+        # Both reads and all four writes happen in one atomic commit, so
+        # concurrent transfers from the same sender cannot lose updates.
+        @self.firestore.transactional
+        def transfer(transaction):
+            stored = self._stored_result(record, transaction)
+            if stored is not None:
+                return stored
+            docs = {doc.id: doc for doc in self.db.get_all(
+                [sender_ref, receiver_ref], field_paths=["balance"], transaction=transaction
+            )}
+            sender, receiver = docs[from_acc], docs[to_acc]
 
             if not receiver.exists:
                 return False, "Recipient account not found"
-            sender_data = sender.to_dict()
-            if sender_data["balance"] < amount:
+            if not sender.exists:
+                return False, "Account not found"
+            if sender.get("balance") < amount:
                 return False, "Insufficient funds"
 
-            # Update balances
-            self.db.collection("accounts").document(from_acc).update({
-                "balance": sender_data["balance"] - amount
-            })
-            self.db.collection("accounts").document(to_acc).update({
-                "balance": receiver.to_dict()["balance"] + amount
-            })
+            transaction.update(sender_ref, {"balance": sender.get("balance") - amount})
+            transaction.update(receiver_ref, {"balance": receiver.get("balance") + amount})
 
-            # Log transactions
             now = datetime.now(timezone.utc).isoformat()
-            self.db.collection("transactions").add({
+            ledger = [{
                 "account_no": from_acc,
                 "transaction_type": "transfer_out",
                 "amount": amount,
                 "category": "Transfer",
                 "recipient_account": to_acc,
                 "timestamp": now
-            })
-            self.db.collection("transactions").add({
+            }, {
                 "account_no": to_acc,
                 "transaction_type": "transfer_in",
                 "amount": amount,
                 "category": "Transfer",
                 "recipient_account": from_acc,
-                "       timestamp": now
-            })
+                "timestamp": now
+            }]
+            for txn in ledger:
+                transaction.set(transactions.document(), txn)
+                self._update_rollup(transaction, txn)
+            result = True, "Transfer successful"
+            self._store_result(transaction, record, result)
+            return result
 
-            return True, "Transfer successful"
+        try:
+            return self._with_retries(idempotency_key, lambda: transfer(self.db.transaction()))
         except Exception as e:
             return False, f"Transfer failed: {str(e)}"
-        
-    def apply_for_loan(self, account_no, amount, term_months, interest_rate):
+        finally:
+            self._invalidate_accounts(from_acc, to_acc)
+
+    # Pays many recipients from one account, e.g. a disbursement run, given
+    # (to_acc, amount) pairs. Recipients are checked with batched get_all
+    # reads, then the total is debited from the sender in one transaction and
+    # recorded in transfer_batches/{id}, with a transfer_chunks record per
+    # chunk. Each chunk's credits and ledger pairs are committed in a
+    # transaction that checks the chunk is still pending, on up to max_workers
+    # threads; chunks that fail are refunded to the sender the same way.
+    # Returns a (success, message) pair per transfer, in input order.
+    # With an idempotency key the batch record is keyed by it: resubmitting
+    # the same transfers resumes that batch instead of debiting again.
+    @instrumented
+    def transfer_money_bulk(self, from_acc, transfers, max_workers=4, idempotency_key=None):
+        transfers = list(transfers)
+        results = [None] * len(transfers)
+        valid = []
+        for i, transfer in enumerate(transfers):
+            try:
+                to_acc, amount = transfer
+                if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount <= 0:
+                    raise ValueError(f"amount must be a positive number, got {amount!r}")
+            except (TypeError, ValueError) as e:
+                results[i] = (False, f"Invalid transfer: {str(e)}")
+                continue
+            if to_acc == from_acc:
+                results[i] = (False, "Cannot transfer to the same account")
+            elif not is_plausible_account_no(to_acc):
+                results[i] = (False, "Recipient account not found")
+            else:
+                valid.append(i)
+
+        accounts = self.db.collection("accounts")
+        try:
+            # Existence is all that is needed, so fetch the smallest field
+            recipients = self._get_documents("accounts", (transfers[i][0] for i in valid), ["balance"])
+        except Exception as e:
+            logger.error(f"Bulk transfer recipient lookup failed: {str(e)}")
+            return [result or (False, f"Transfer failed: {str(e)}") for result in results]
+        for i in valid:
+            if recipients[transfers[i][0]] is None:
+                results[i] = (False, "Recipient account not found")
+        valid = [i for i in valid if recipients[transfers[i][0]] is not None]
+        if not valid:
+            return results
+
+        # A credit is 4 writes (balance, two ledger entries, recipient rollup),
+        # plus the sender rollup and the chunk record per chunk
+        per_chunk = (WRITE_LIMIT - 2) // 4
+        chunks = [valid[i:i + per_chunk] for i in range(0, len(valid), per_chunk)]
+        # The reservation writes the sender, the batch record and every chunk record
+        if len(chunks) + 2 > WRITE_LIMIT:
+            for i in valid:
+                results[i] = (False, "Too many transfers for one batch")
+            return results
+
+        total = sum(transfers[i][1] for i in valid)
+        sender_ref = accounts.document(from_acc)
+        key_record = self._idempotency_record(
+            idempotency_key, "bulk_transfer", from_acc, [transfers[i] for i in valid],
+            collection="transfer_batches"
+        )
+        if key_record is None:
+            batch_ref, fingerprint = self.db.collection("transfer_batches").document(), None
+        else:
+            batch_ref, _, fingerprint = key_record
+        chunk_refs = [
+            self.db.collection("transfer_chunks").document(f"{batch_ref.id}-{n}")
+            for n in range(len(chunks))
+        ]
+
+        # Debits the total and records each chunk as pending, so a batch a
+        # crash leaves reserved can be settled by settle_transfer_batches
+        @self.firestore.transactional
+        def reserve(transaction):
+            if key_record is not None:
+                batch = batch_ref.get(["fingerprint"], transaction=transaction)
+                if batch.exists:
+                    _check_fingerprint(batch, fingerprint)
+                    return None
+            sender = sender_ref.get(["balance"], transaction=transaction)
+            if not sender.exists:
+                return "Account not found"
+            if sender.get("balance") < total:
+                return "Insufficient funds"
+            transaction.update(sender_ref, {"balance": sender.get("balance") - total})
+            transaction.set(batch_ref, {
+                "from_acc": from_acc,
+                "total": total,
+                "transfers": len(valid),
+                "chunks": len(chunks),
+                "status": "reserved",
+                "fingerprint": fingerprint,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            })
+            for chunk_ref, chunk in zip(chunk_refs, chunks):
+                transaction.set(chunk_ref, {
+                    "batch_id": batch_ref.id,
+                    "from_acc": from_acc,
+                    "transfers": [{"to_acc": transfers[i][0], "amount": transfers[i][1]} for i in chunk],
+                    "status": "pending"
+                })
+            return None
+
+        try:
+            error = self._with_retries(idempotency_key, lambda: reserve(self.db.transaction()))
+        except Exception as e:
+            error = f"Transfer failed: {str(e)}"
+        finally:
+            self._invalidate_accounts(from_acc)
+        if error:
+            for i in valid:
+                results[i] = (False, error)
+            return results
+
+        # Returns None once the chunk is credited, else the error
+        def credit(n):
+            try:
+                status, _ = self._with_retries(
+                    idempotency_key, lambda: self._settle_transfer_chunk(chunk_refs[n], from_acc, complete=True)
+                )
+                if status == "refunded":
+                    return "refunded by an earlier attempt"
+                for i in chunks[n]:
+                    results[i] = (True, "Transfer successful")
+                return None
+            except Exception as e:
+                logger.error(f"Bulk transfer chunk failed: {str(e)}")
+                return str(e)
+
+        with ThreadPoolExecutor(max(1, min(max_workers, len(chunks)))) as pool:
+            errors = [future.result() for future in [submit(pool, credit, n) for n in range(len(chunks))]]
+
+        # Refund failed chunks through the same status check, so a chunk whose
+        # credit went through despite the error is reported as credited, not
+        # refunded. Results are only set once the outcome is known.
+        refunded = pending = 0
+        for n, error in enumerate(errors):
+            if error is None:
+                continue
+            try:
+                status, amount = self._settle_transfer_chunk(chunk_refs[n], from_acc, complete=False)
+            except Exception as e:
+                logger.error(f"Bulk transfer {batch_ref.id} could not refund chunk {n}: {str(e)}")
+                status, amount = "pending", 0
+                pending += sum(transfers[i][1] for i in chunks[n])
+            refunded += amount
+            for i in chunks[n]:
+                if status == "credited":
+                    results[i] = (True, "Transfer successful")
+                elif status == "refunded":
+                    results[i] = (False, f"Transfer failed, amount refunded: {error}")
+                else:
+                    results[i] = (False, f"Transfer failed, refund pending: {error}")
+
+        # Close the batch record; with refunds pending it is left for
+        # settle_transfer_batches
+        try:
+            if pending:
+                batch_ref.update({"status": "refund_failed", "refund_pending": pending})
+            else:
+                batch_ref.update({
+                    "status": "partial" if refunded else "completed",
+                    "refunded": refunded,
+                    "completed_at": datetime.now(timezone.utc).isoformat()
+                })
+        except Exception as e:
+            logger.error(f"Bulk transfer {batch_ref.id} could not be closed: {str(e)}")
+        return results
+
+    # Credits (complete=True) or refunds one bulk transfer chunk in a
+    # transaction that first checks the chunk is still pending, so no chunk is
+    # credited and refunded, or either twice. Returns its (status, amount
+    # refunded); a chunk settled before keeps its status.
+    def _settle_transfer_chunk(self, chunk_ref, from_acc, complete):
+        sender_ref = self.db.collection("accounts").document(from_acc)
+        touched = [from_acc]
+
+        @self.firestore.transactional
+        def settle(transaction):
+            chunk = chunk_ref.get(transaction=transaction).to_dict()
+            items = [(t["to_acc"], t["amount"]) for t in chunk["transfers"]]
+            if chunk["status"] == "pending":
+                if complete:
+                    self._credit_transfer_chunk(transaction, from_acc, chunk_ref, items)
+                    touched.extend(to_acc for to_acc, _ in items)
+                    return "credited", 0
+                transaction.update(sender_ref, {
+                    "balance": self.firestore.Increment(sum(amount for _, amount in items))
+                })
+                transaction.update(chunk_ref, {"status": "refunded"})
+                chunk["status"] = "refunded"
+            refunded = sum(amount for _, amount in items) if chunk["status"] == "refunded" else 0
+            return chunk["status"], refunded
+
+        try:
+            return settle(self.db.transaction())
+        finally:
+            self._invalidate_accounts(*touched)
+
+    # Writes one chunk of a bulk transfer: one balance write per recipient
+    # (even if it appears more than once), the ledger pair of each transfer,
+    # merged rollups and the chunk record, all in the writer's commit
+    def _credit_transfer_chunk(self, writer, from_acc, chunk_ref, items):
+        accounts = self.db.collection("accounts")
+        ledger = []
+        credits = {}
+        now = datetime.now(timezone.utc).isoformat()
+        for to_acc, amount in items:
+            credits[to_acc] = credits.get(to_acc, 0) + amount
+            ledger += [{
+                "account_no": from_acc,
+                "transaction_type": "transfer_out",
+                "amount": amount,
+                "category": "Transfer",
+                "recipient_account": to_acc,
+                "timestamp": now
+            }, {
+                "account_no": to_acc,
+                "transaction_type": "transfer_in",
+                "amount": amount,
+                "category": "Transfer",
+                "recipient_account": from_acc,
+                "timestamp": now
+            }]
+        for to_acc, amount in credits.items():
+            writer.update(accounts.document(to_acc), {"balance": self.firestore.Increment(amount)})
+        for txn in ledger:
+            writer.set(self.db.collection("transactions").document(), txn)
+        self._update_rollups(writer, ledger)
+        writer.update(chunk_ref, {"status": "credited"})
+
+    # Settles bulk transfer batches that a crash left "reserved" or whose
+    # refund failed: their pending chunks are credited (complete=True) or
+    # refunded to the sender. Only batches created more than older_than
+    # seconds ago are touched, so transfers still in flight are left alone.
+    # Returns {batch_id: status}.
+    @instrumented
+    def settle_transfer_batches(self, complete=False, older_than=600):
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=older_than)).isoformat()
+        settled = {}
+        batches = self.db.collection("transfer_batches") \
+            .where("status", "in", ["reserved", "refund_failed"]) \
+            .stream()
+        for batch in batches:
+            data = batch.to_dict()
+            if data["created_at"] > cutoff:
+                continue
+            try:
+                settled[batch.id] = self._settle_transfer_batch(batch.reference, data["from_acc"], complete)
+            except Exception as e:
+                logger.error(f"Could not settle transfer batch {batch.id}: {str(e)}")
+        return settled
+
+    def _settle_transfer_batch(self, batch_ref, from_acc, complete):
+        chunks = self.db.collection("transfer_chunks") \
+            .where("batch_id", "==", batch_ref.id) \
+            .stream()
+        outcomes = [self._settle_transfer_chunk(chunk.reference, from_acc, complete) for chunk in chunks]
+        refunded = sum(amount for _, amount in outcomes)
+        status = "partial" if refunded else "completed"
+        batch_ref.update({
+            "status": status,
+            "refunded": refunded,
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        })
+        return status
+
+    @instrumented
+    def apply_for_loan(self, account_no, amount, term_months, interest_rate, idempotency_key=None):
+        record = self._idempotency_record(
+            idempotency_key, "loan", account_no, amount, term_months, interest_rate
+        )
         try:
             total_interest = (amount * interest_rate * term_months) / (12 * 100)
             total_amount = amount + total_interest
             monthly_payment = total_amount / term_months
-            next_payment_date = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
-
-            # Update balance
-            acc_ref = self.db.collection("accounts").document(account_no)
-            acc_data = acc_ref.get().to_dict()
-            acc_ref.update({
-                "balance": acc_data["balance"] + amount
-            })
+            now = datetime.now(timezone.utc)
+            next_payment_date = (now + timedelta(days=30)).isoformat()
 
-            # Record loan
             loan = {
                 "account_no": account_no,
                 "amount": amount,
@@ -163,81 +910,262 @@ class BankingSystem:
                 "monthly_payment": monthly_payment,
                 "remaining_amount": total_amount,
                 "status": "active",
-                "start_date": datetime.now(timezone.utc).isoformat(),
+                "start_date": now.isoformat(),
                 "next_payment_date": next_payment_date
             }
-            self.db.collection("loans").add(loan)
-
-            # Record transaction
-            self.db.collection("transactions").add({
+            txn = {
                 "account_no": account_no,
                 "transaction_type": "loan_disbursement",
                 "amount": amount,
                 "category": "Loan",
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            })
-            return True, "Loan approved"
+                "timestamp": now.isoformat()
+            }
+
+            # Credit, loan record, ledger entry and rollup in one commit
+            def disburse():
+                result = True, "Loan approved"
+                batch = self.db.batch()
+                batch.update(self.db.collection("accounts").document(account_no), {
+                    "balance": self.firestore.Increment(amount)
+                })
+                batch.set(self.db.collection("loans").document(), loan)
+                batch.set(self.db.collection("transactions").document(), txn)
+                self._update_rollup(batch, txn)
+                self._store_result(batch, record, result)
+                try:
+                    batch.commit()
+                except self.already_exists_error:
+                    return self._stored_result(record)
+                return result
+
+            return self._with_retries(idempotency_key, disburse)
         except Exception as e:
             return False, f"Loan failed: {str(e)}"
+        finally:
+            self._invalidate_accounts(account_no)
 
+    @instrumented
     def get_active_loans(self, account_no):
         try:
             loans = self.db.collection("loans") \
                 .where("account_no", "==", account_no) \
                 .where("status", "==", "active") \
+                .select(LOAN_FIELDS) \
                 .stream()
             return [loan.to_dict() | {"loan_id": loan.id} for loan in loans]
         except Exception as e:
             logger.error(f"Error fetching loans: {str(e)}")
             return []
 
-    def make_loan_payment(self, loan_id, payment_amount):
-        try:
-            loan_ref = self.db.collection("loans").document(loan_id)
-            loan = loan_ref.get().to_dict()
+    @instrumented
+    def make_loan_payment(self, loan_id, payment_amount, idempotency_key=None):
+        loan_ref = self.db.collection("loans").document(loan_id)
+        record = self._idempotency_record(idempotency_key, "loan_payment", loan_id, payment_amount)
+        paying_accounts = []
+
+        @self.firestore.transactional
+        def pay(transaction):
+            stored = self._stored_result(record, transaction)
+            if stored is not None:
+                return stored
+            loan = loan_ref.get(transaction=transaction).to_dict()
             if not loan or loan["status"] != "active":
                 return False, "Loan not found or inactive"
+            paying_accounts.append(loan["account_no"])
 
             acc_ref = self.db.collection("accounts").document(loan["account_no"])
-            acc = acc_ref.get().to_dict()
+            acc = acc_ref.get(["balance"], transaction=transaction).to_dict()
 
             if acc["balance"] < payment_amount:
                 return False, "Insufficient funds"
 
             new_remaining = loan["remaining_amount"] - payment_amount
             new_status = "completed" if new_remaining <= 0 else "active"
-            next_date = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+            now = datetime.now(timezone.utc)
+            next_date = (now + timedelta(days=30)).isoformat()
 
             # Update loan & account
-            loan_ref.update({
+            transaction.update(loan_ref, {
                 "remaining_amount": new_remaining,
                 "next_payment_date": next_date,
                 "status": new_status
             })
-            acc_ref.update({
+            transaction.update(acc_ref, {
                 "balance": acc["balance"] - payment_amount
             })
 
             # Log transaction
-            self.db.collection("transactions").add({
+            txn = {
                 "account_no": loan["account_no"],
                 "transaction_type": "loan_payment",
                 "amount": payment_amount,
                 "category": "Loan Payment",
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            })
-            return True, "Payment successful"
+                "timestamp": now.isoformat()
+            }
+            transaction.set(self.db.collection("transactions").document(), txn)
+            self._update_rollup(transaction, txn)
+            result = True, "Payment successful"
+            self._store_result(transaction, record, result)
+            return result
+
+        try:
+            return self._with_retries(idempotency_key, lambda: pay(self.db.transaction()))
         except Exception as e:
             return False, f"Payment failed: {str(e)}"
+        finally:
+            self._invalidate_accounts(*paying_accounts)
 
+    # Per-account totals by month x type and by type x category, kept up to
+    # date by every write path so charts never have to scan the ledger.
+    def _update_rollup(self, writer, txn):
+        self._update_rollups(writer, [txn])
+
+    # One merged rollup write per account, however many entries it covers
+    def _update_rollups(self, writer, txns):
+        totals = {}
+        for txn in txns:
+            monthly, categories = totals.setdefault(txn["account_no"], ({}, {}))
+            month = monthly.setdefault(txn["timestamp"][:7], {})
+            month[txn["transaction_type"]] = month.get(txn["transaction_type"], 0) + txn["amount"]
+            category = categories.setdefault(txn["transaction_type"], {})
+            category[txn["category"]] = category.get(txn["category"], 0) + txn["amount"]
+        for account_no, (monthly, categories) in totals.items():
+            writer.set(self.db.collection("rollups").document(account_no), {
+                "monthly": {month: {t: self.firestore.Increment(v) for t, v in by_type.items()}
+                            for month, by_type in monthly.items()},
+                "categories": {t: {c: self.firestore.Increment(v) for c, v in by_category.items()}
+                               for t, by_category in categories.items()}
+            }, merge=True)
+
+    # rebuild=False returns None instead of backfilling a rollup that is not
+    # backfilled yet, which scans the account's whole history
+    @instrumented
+    def get_rollup(self, account_no, rebuild=True):
+        try:
+            rollup = self.db.collection("rollups").document(account_no).get().to_dict()
+            if rollup and rollup.get("backfilled"):
+                return rollup
+            if not rebuild:
+                return None
+            return self.rebuild_rollup(account_no)
+        except Exception as e:
+            logger.error(f"Error fetching rollup: {str(e)}")
+            return {}
+
+    # Backfills the rollup for accounts whose history predates rollups. The
+    # bulk of the history (entries older than the cutoff) is scanned first;
+    # newer entries are read in the transaction that writes the rollup and
+    # marks it backfilled. That transaction reads the rollup document, which
+    # every ledger write also writes, so entries committed while it runs are
+    # applied on top of the backfilled rollup rather than lost.
+    @instrumented
+    def rebuild_rollup(self, account_no):
+        rollup_ref = self.db.collection("rollups").document(account_no)
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=ROLLUP_BACKFILL_OVERLAP)).isoformat()
+        older = {"monthly": {}, "categories": {}}
+        for txn in self._history_query(account_no).where("timestamp", "<", cutoff).stream():
+            _add_to_rollup(older, txn.to_dict())
+
+        @self.firestore.transactional
+        def backfill(transaction):
+            current = rollup_ref.get(transaction=transaction).to_dict()
+            if current and current.get("backfilled"):
+                return current
+            rollup = copy.deepcopy(older)
+            recent = self._history_query(account_no).where("timestamp", ">=", cutoff)
+            for txn in recent.stream(transaction=transaction):
+                _add_to_rollup(rollup, txn.to_dict())
+            rollup["backfilled"] = True
+            transaction.set(rollup_ref, rollup)
+            return rollup
+
+        return backfill(self.db.transaction())
+
+    # Ledger entries of an account, newest first, with only the given fields.
+    # Listeners pass fields=None: Firestore cannot listen to projections.
+    def _history_query(self, account_no, fields=HISTORY_FIELDS):
+        query = self.db.collection("transactions") \
+            .where("account_no", "==", account_no) \
+            .order_by("timestamp", direction=self.firestore.Query.DESCENDING)
+        if fields is not None:
+            query = query.select(fields)
+        return query
+
+    # Fetches the entries written since the account's last sync into the
+    # transaction cache; the first sync fetches the whole history
+    @instrumented
+    def sync_transaction_cache(self, account_no):
+        since = self.transaction_cache.sync_from(account_no)
+        query = self._history_query(account_no)
+        if since is not None:
+            query = query.where("timestamp", ">=", since)
+        return self.transaction_cache.add(
+            account_no, ((txn.id, txn.to_dict()) for txn in query.stream())
+        )
+
+    @instrumented
     def get_transaction_history(self, account_no):
         try:
-            txns = self.db.collection("transactions") \
-                .where("account_no", "==", account_no) \
-                .order_by("timestamp", direction=firestore.Query.DESCENDING) \
-                .stream()
+            if self.transaction_cache is not None:
+                self.sync_transaction_cache(account_no)
+                return self.transaction_cache.page(account_no)[0]
+            txns = self._history_query(account_no).stream()
             return [txn.to_dict() for txn in txns]
         except Exception as e:
             logger.error(f"Error fetching transactions: {str(e)}")
             return []
 
+    # Returns (transactions, cursor), newest first. Pass the cursor back to get
+    # the next page; it is None once there are no more transactions. With the
+    # transaction cache, the first page syncs it and pages are read from it.
+    # full_sync=False answers the first page of an account the cache never
+    # synced with a limited query, leaving the full download to a later page.
+    @instrumented
+    def get_transaction_history_page(self, account_no, limit=50, cursor=None, full_sync=True):
+        try:
+            view = self.account_views.get(account_no)
+            if view is not None and cursor is None and self.transaction_cache is None:
+                page = view.first_page(limit)
+                if page is not None:
+                    return page
+            if self.transaction_cache is not None:
+                synced = self.transaction_cache.sync_from(account_no) is not None
+                if synced or full_sync or cursor is not None:
+                    if cursor is None or not synced:
+                        self.sync_transaction_cache(account_no)
+                    return self.transaction_cache.page(account_no, limit, cursor)
+            query = self._history_query(account_no).limit(limit)
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = list(query.stream())
+            next_cursor = docs[-1] if len(docs) == limit else None
+            if self.transaction_cache is not None and next_cursor is not None:
+                # The next page comes from the cache, which takes (timestamp, doc_id)
+                next_cursor = (next_cursor.get("timestamp"), next_cursor.id)
+            return [doc.to_dict() for doc in docs], next_cursor
+        except Exception as e:
+            logger.error(f"Error fetching transactions: {str(e)}")
+            return [], None
+
+    def iter_transaction_history(self, account_no, page_size=500):
+        cursor = None
+        while True:
+            txns, cursor = self.get_transaction_history_page(account_no, page_size, cursor)
+            yield from txns
+            if cursor is None:
+                return
+
+    # get_transaction_history as columnar.TransactionColumns, filled as the
+    # query streams so documents are never all held as dicts at once
+    @instrumented
+    def get_transaction_columns(self, account_no):
+        from columnar import TransactionColumns
+
+        columns = TransactionColumns()
+        try:
+            for txn in self._history_query(account_no).stream():
+                columns.append(txn.to_dict())
+            return columns
+        except Exception as e:
+            logger.error(f"Error fetching transactions: {str(e)}")
+            return TransactionColumns()
@@ -0,0 +1,50 @@
+# account_cache.py
+# Bounded LRU cache of account documents with a time-to-live, shared by all
+# sessions through the process-wide BankingSystem.
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class AccountCache:
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, account_no):
+        with self._lock:
+            entry = self._entries.get(account_no)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(account_no, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(account_no)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, account_no, data):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[account_no] = (time.monotonic() + self.ttl, copy.deepcopy(data))
+            self._entries.move_to_end(account_no)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *account_nos):
+        with self._lock:
+            for account_no in account_nos:
+                self._entries.pop(account_no, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,70 @@
+# account_numbers.py
+# Account numbers are 9 sequence digits plus a Luhn check digit. Each process
+# reserves a block of sequence numbers with one transaction on
+# counters/account_numbers and hands them out locally, so numbers are unique
+# without an existence check per account.
+import threading
+
+ACCOUNT_NO_LENGTH = 10
+MAX_SEQUENCE = 10 ** (ACCOUNT_NO_LENGTH - 1)
+# Start at 100000000 so account numbers never begin with a run of zeros
+FIRST_SEQUENCE = MAX_SEQUENCE // 10
+
+
+def luhn_check_digit(digits):
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        n = int(d)
+        if i % 2 == 0:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return str((10 - total % 10) % 10)
+
+
+def format_account_no(sequence):
+    body = f"{sequence:0{ACCOUNT_NO_LENGTH - 1}d}"
+    return body + luhn_check_digit(body)
+
+
+def is_plausible_account_no(account_no):
+    if not isinstance(account_no, str):
+        return False
+    # Legacy 8-character numbers carry no check digit and are always accepted
+    if len(account_no) != ACCOUNT_NO_LENGTH or not account_no.isdigit():
+        return len(account_no) == 8
+    return luhn_check_digit(account_no[:-1]) == account_no[-1]
+
+
+class AccountNumberAllocator:
+    def __init__(self, db, firestore, block_size=1000):
+        self.db = db
+        self.firestore = firestore
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve_block()
+            sequence = self._next
+            self._next += 1
+        return format_account_no(sequence)
+
+    def _reserve_block(self):
+        counter_ref = self.db.collection("counters").document("account_numbers")
+
+        @self.firestore.transactional
+        def reserve(transaction):
+            counter = counter_ref.get(transaction=transaction).to_dict() or {}
+            start = counter.get("next", FIRST_SEQUENCE)
+            if start + self.block_size > MAX_SEQUENCE:
+                raise RuntimeError("Account number space exhausted")
+            transaction.set(counter_ref, {"next": start + self.block_size})
+            return start
+
+        start = reserve(self.db.transaction())
+        return start, start + self.block_size
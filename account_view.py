@@ -0,0 +1,80 @@
+# account_view.py
+# Local copy of one account's document and newest ledger entries, kept up to
+# date by Firestore on_snapshot listeners instead of being re-read on every
+# Streamlit rerun. Listener callbacks run on the client's own thread.
+import copy
+import threading
+import time
+
+# After one of our own writes the view is bypassed until the listener
+# delivers it, or for at most this long if it was delivered before we asked
+STALE_SECONDS = 5.0
+
+
+# Document listeners cannot take a field mask, so the view drops the fields
+# it was not asked to keep (the password hash) as snapshots arrive
+def _keep(data, fields):
+    if data is None or fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+
+class AccountView:
+    def __init__(self, account_ref, history_query, history_size, account_fields=None):
+        self.history_size = history_size
+        self.account_fields = account_fields
+        self.account = None
+        self.transactions = None
+        # Bumped on every update, so readers can tell when something changed
+        self.version = 0
+        self.last_used = time.monotonic()
+        self._account_stale_until = 0.0
+        self._history_stale_until = 0.0
+        self._lock = threading.Lock()
+        self._watches = [
+            account_ref.on_snapshot(self._on_account),
+            history_query.limit(history_size).on_snapshot(self._on_transactions),
+        ]
+
+    def _on_account(self, snapshots, changes, read_time):
+        snapshot = snapshots[0] if snapshots else None
+        with self._lock:
+            data = snapshot.to_dict() if snapshot is not None and snapshot.exists else None
+            self.account = _keep(data, self.account_fields)
+            self._account_stale_until = 0.0
+            self.version += 1
+
+    def _on_transactions(self, snapshots, changes, read_time):
+        with self._lock:
+            self.transactions = list(snapshots)
+            self._history_stale_until = 0.0
+            self.version += 1
+
+    def mark_stale(self):
+        with self._lock:
+            self._account_stale_until = self._history_stale_until = time.monotonic() + STALE_SECONDS
+
+    # Copy of the account document, or None until the first snapshot arrives
+    def get_account(self):
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self._account_stale_until > self.last_used:
+                return None
+            return copy.deepcopy(self.account)
+
+    # Same result as BankingSystem.get_transaction_history_page for the first
+    # page, or None when the view does not hold it (yet)
+    def first_page(self, limit):
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self._history_stale_until > self.last_used:
+                return None
+            if self.transactions is None or limit > self.history_size:
+                return None
+            docs = self.transactions[:limit]
+        next_cursor = docs[-1] if len(docs) == limit else None
+        return [doc.to_dict() for doc in docs], next_cursor
+
+    def close(self):
+        for watch in self._watches:
+            watch.unsubscribe()
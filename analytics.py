@@ -0,0 +1,85 @@
+# analytics.py
+# History-tab analytics: the transaction table, expenses by category and the
+# monthly deposit/withdraw summary, built from one DataFrame in a single pass.
+# Types and categories are categoricals and months are periods, so nothing
+# is formatted or re-parsed per row. Imported lazily: pandas is slow to load.
+import numpy as np
+import pandas as pd
+
+TRANSACTION_TYPES = [
+    "deposit", "withdraw", "transfer_in", "transfer_out", "loan_disbursement", "loan_payment"
+]
+# Loans count as deposits and withdrawals in the monthly summary
+SUMMARY_TYPES = ["deposit", "withdraw", "transfer_in", "transfer_out"]
+_SUMMARY_CODES = np.array([SUMMARY_TYPES.index(t) for t in
+                           ["deposit", "withdraw", "transfer_in", "transfer_out", "deposit", "withdraw"]])
+
+TABLE_COLUMNS = {
+    "transaction_type": "Type",
+    "amount": "Amount",
+    "category": "Category",
+    "recipient_account": "Transfer Account",
+    "timestamp": "timestamp",
+}
+
+
+def transactions_frame(transactions):
+    # Accepts a list of transaction dicts, a dict of equal-length columns or a
+    # DataFrame such as columnar.TransactionColumns.to_frame()
+    if isinstance(transactions, pd.DataFrame):
+        df = transactions.reindex(columns=list(TABLE_COLUMNS))
+    else:
+        df = pd.DataFrame(transactions, columns=list(TABLE_COLUMNS))
+    df["transaction_type"] = pd.Categorical(df["transaction_type"], categories=TRANSACTION_TYPES)
+    df["category"] = df["category"].astype("category")
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    return df.rename(columns=TABLE_COLUMNS)
+
+
+# Period ordinals (months since 1970-01) of each timestamp, and which have one
+def _months(timestamps):
+    if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        valid = timestamps.notna().to_numpy()
+        ordinals = (timestamps.dt.year - 1970) * 12 + timestamps.dt.month - 1
+        return ordinals.fillna(0).to_numpy(dtype=np.int64), valid
+    # A transaction's month is the "YYYY-MM" prefix of its UTC ISO timestamp,
+    # as in the rollup. Only the distinct prefixes are parsed; code -1 (no
+    # timestamp) picks the appended invalid sentinel.
+    prefixes = pd.Categorical(timestamps.astype("string").str.slice(0, 7))
+    parsed = pd.to_datetime(prefixes.categories, format="%Y-%m", errors="coerce")
+    ordinals = np.append(parsed.to_period("M").asi8, 0)
+    valid = np.append(parsed.notna(), False)
+    return ordinals[prefixes.codes], valid[prefixes.codes]
+
+
+# Returns (table, expenses_by_category, monthly_summary): expenses are indexed
+# by category, the summary by "YYYY-MM" with one column per summary type.
+def summarize_transactions(transactions):
+    table = transactions_frame(transactions)
+    codes = table["Type"].cat.codes.to_numpy()
+    amount = table["Amount"]
+
+    withdraw = codes == TRANSACTION_TYPES.index("withdraw")
+    expenses = amount[withdraw].groupby(table["Category"][withdraw], observed=True).sum()
+
+    month_ordinals, has_month = _months(table["timestamp"])
+    valid = has_month & (codes >= 0)
+    months = month_ordinals[valid]
+    summary_codes = _SUMMARY_CODES[codes[valid]]
+    monthly = amount[valid].groupby([months, summary_codes]).sum().unstack(fill_value=0).sort_index()
+    monthly.index = pd.PeriodIndex.from_ordinals(monthly.index, freq="M").strftime("%Y-%m")
+    monthly.columns = [SUMMARY_TYPES[code] for code in monthly.columns]
+    return table, expenses, monthly
+
+
+# The same expenses and monthly summary from a BankingSystem.get_rollup() document
+def summarize_rollup(rollup):
+    expenses = pd.Series(rollup.get("categories", {}).get("withdraw", {}), dtype=float)
+    months = sorted(rollup.get("monthly", {}).items())
+    totals = np.zeros((len(months), len(SUMMARY_TYPES)))
+    for row, (_, by_type) in enumerate(months):
+        for txn_type, amount in by_type.items():
+            if txn_type in TRANSACTION_TYPES:
+                totals[row, _SUMMARY_CODES[TRANSACTION_TYPES.index(txn_type)]] += amount
+    monthly = pd.DataFrame(totals, index=[month for month, _ in months], columns=SUMMARY_TYPES)
+    return expenses, monthly.loc[:, monthly.any(axis=0)]
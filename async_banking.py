@@ -0,0 +1,65 @@
+# async_banking.py
+# asyncio front end to BankingSystem for API servers and other async code.
+# Every public BankingSystem method is available as a coroutine that runs the
+# synchronous call on a worker thread (iter_transaction_history as an async
+# generator). The Firestore client releases the GIL while waiting on the
+# network, so independent calls gathered together overlap their round trips,
+# and the transactions, caches, metrics and backends of BankingSystem are
+# shared rather than reimplemented.
+import asyncio
+import functools
+import inspect
+
+from Firebase_code import BankingSystem
+
+
+class AsyncBankingSystem:
+    def __init__(self, banking_system=None, backend=None):
+        self.sync = banking_system or BankingSystem(backend)
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if inspect.isgeneratorfunction(attr):
+            # Iterating the returned generator would run its queries on the
+            # event loop; generators get async versions defined below instead
+            raise AttributeError(f"{name} has no async version")
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attr, *args, **kwargs)
+        return call
+
+    # Async generator over the whole history, newest first, fetching each page
+    # on a worker thread
+    async def iter_transaction_history(self, account_no, page_size=500):
+        cursor = None
+        while True:
+            txns, cursor = await asyncio.to_thread(
+                self.sync.get_transaction_history_page, account_no, page_size, cursor
+            )
+            for txn in txns:
+                yield txn
+            if cursor is None:
+                return
+
+    # Everything the dashboard shows on first paint, fetched concurrently:
+    # waits for the slowest query instead of the sum of all of them. The
+    # rollup is only included if it is already backfilled (None otherwise),
+    # and the history page does not start a first sync of the transaction
+    # cache: both scan the whole history and are left to the History tab.
+    async def get_dashboard(self, account_no, history_limit=50):
+        details, loans, (transactions, cursor), rollup = await asyncio.gather(
+            self.get_user_details(account_no),
+            self.get_active_loans(account_no),
+            self.get_transaction_history_page(account_no, history_limit, full_sync=False),
+            self.get_rollup(account_no, rebuild=False),
+        )
+        return {
+            "details": details,
+            "loans": loans,
+            "history": {"transactions": transactions, "cursor": cursor},
+            "rollup": rollup,
+        }
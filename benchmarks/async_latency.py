@@ -0,0 +1,85 @@
+# benchmarks/async_latency.py
+# Latency of BankingSystem versus AsyncBankingSystem with a simulated network
+# round trip on the memory store: loading everything the dashboard shows, and
+# a burst of independent deposits issued one after another versus gathered.
+#
+#     python -m benchmarks.async_latency --latency-ms 20 --repeat 20
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+from async_banking import AsyncBankingSystem
+from Firebase_code import BankingSystem
+from benchmarks.common import latency_summary, write_results
+from benchmarks.run_benchmarks import seed
+
+
+def sync_dashboard(bs, account_no):
+    bs.get_user_details(account_no)
+    bs.get_active_loans(account_no)
+    bs.get_transaction_history_page(account_no)
+    bs.get_rollup(account_no)
+
+
+def sync_deposits(bs, account_nos):
+    for account_no in account_nos:
+        bs.record_transaction(account_no, "deposit", 1.0, "Salary")
+
+
+async def async_deposits(abs_, account_nos):
+    await asyncio.gather(*(
+        abs_.record_transaction(account_no, "deposit", 1.0, "Salary") for account_no in account_nos
+    ))
+
+
+def timed(call, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync versus async BankingSystem latency")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bs = BankingSystem("memory")
+    account_nos, merchant = seed(bs, args.accounts, 1000)
+    bs.apply_for_loan(merchant, 10_000, 12, 10)
+    bs.get_rollup(merchant)
+    abs_ = AsyncBankingSystem(bs)
+    # Account reads would otherwise be served from the cache after the first call
+    bs.account_cache.maxsize = 0
+    bs.account_cache.clear()
+    bs.db.latency = args.latency_ms / 1000
+
+    results = {
+        "latency_ms": args.latency_ms,
+        "accounts": args.accounts,
+        "dashboard": {
+            "sync": timed(lambda: sync_dashboard(bs, merchant), args.repeat),
+            "async": timed(lambda: asyncio.run(abs_.get_dashboard(merchant)), args.repeat),
+        },
+        "deposits": {
+            "sync": timed(lambda: sync_deposits(bs, account_nos), args.repeat),
+            "async": timed(lambda: asyncio.run(async_deposits(abs_, account_nos)), args.repeat),
+        },
+    }
+    for scenario in ("dashboard", "deposits"):
+        for mode in ("sync", "async"):
+            r = results[scenario][mode]
+            print(f"{scenario:>10} {mode:>5}: p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms")
+    print("Results written to", write_results("async_latency", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
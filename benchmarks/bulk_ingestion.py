@@ -0,0 +1,79 @@
+# benchmarks/bulk_ingestion.py
+# Throughput of a payroll-style run of deposits (plus a few withdrawals)
+# recorded one record_transaction call at a time versus one
+# record_transactions_bulk call, against the memory store with a simulated
+# round-trip latency or a Firestore emulator.
+#
+#     python -m benchmarks.bulk_ingestion --records 20000 --latency-ms 5
+#     FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.bulk_ingestion --backend emulator
+import argparse
+import os
+import time
+
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+from Firebase_code import BankingSystem
+from benchmarks.common import write_results
+from benchmarks.run_benchmarks import seed
+
+
+def make_records(account_nos, count):
+    return [
+        (account_nos[i % len(account_nos)], "withdraw" if i % 10 == 9 else "deposit",
+         float(100 + i % 900), "Bills" if i % 10 == 9 else "Salary")
+        for i in range(count)
+    ]
+
+
+def run(bs, name, call, records):
+    stats_before = bs.db.stats() if hasattr(bs.db, "stats") else None
+    start = time.perf_counter()
+    succeeded = call(records)
+    elapsed = time.perf_counter() - start
+    result = {"records_per_second": len(records) / elapsed, "seconds": elapsed, "succeeded": succeeded}
+    if stats_before is not None:
+        stats_after = bs.db.stats()
+        result["round_trips"] = stats_after["round_trips"] - stats_before["round_trips"]
+    print(f"{name:>6}: {result['records_per_second']:10.1f} records/s  {elapsed:8.2f} s  "
+          f"round trips {result.get('round_trips', '-')}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call versus bulk transaction ingestion")
+    parser.add_argument("--backend", default="memory", choices=["memory", "emulator"])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--loop-records", type=int, default=500,
+                        help="records for the slow per-call loop (throughput is per record)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=5, help="memory backend only")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bs = BankingSystem(args.backend)
+    account_nos, _ = seed(bs, args.accounts, 0)
+    if args.backend == "memory":
+        bs.db.latency = args.latency_ms / 1000
+
+    def loop(records):
+        return sum(bs.record_transaction(*record) for record in records)
+
+    def bulk(records):
+        return sum(ok for ok, _ in bs.record_transactions_bulk(records, max_workers=args.workers))
+
+    results = {
+        "backend": args.backend,
+        "accounts": args.accounts,
+        "latency_ms": args.latency_ms if args.backend == "memory" else None,
+        "loop": run(bs, "loop", loop, make_records(account_nos, args.loop_records)),
+        "bulk": run(bs, "bulk", bulk, make_records(account_nos, args.records)),
+    }
+    results["speedup"] = results["bulk"]["records_per_second"] / results["loop"]["records_per_second"]
+    print(f"speedup: {results['speedup']:.1f}x")
+    bs.password_hasher.shutdown()
+    print("Results written to", write_results("bulk_ingestion", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bulk_transfers.py
+# A disbursement from one treasury account to many recipients: transfer_money
+# in a loop versus one transfer_money_bulk call, against the memory store with
+# a simulated round-trip latency or a Firestore emulator.
+#
+#     python -m benchmarks.bulk_transfers --recipients 5000 --latency-ms 5
+#     FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.bulk_transfers --backend emulator
+import argparse
+import os
+import time
+
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+from Firebase_code import BankingSystem
+from benchmarks.common import write_results
+from benchmarks.run_benchmarks import seed
+
+
+def run(bs, name, call, transfers):
+    stats_before = bs.db.stats() if hasattr(bs.db, "stats") else None
+    start = time.perf_counter()
+    succeeded = call(transfers)
+    elapsed = time.perf_counter() - start
+    result = {"transfers_per_second": len(transfers) / elapsed, "seconds": elapsed, "succeeded": succeeded}
+    if stats_before is not None:
+        stats_after = bs.db.stats()
+        result["round_trips"] = stats_after["round_trips"] - stats_before["round_trips"]
+    print(f"{name:>6}: {result['transfers_per_second']:10.1f} transfers/s  {elapsed:8.2f} s  "
+          f"round trips {result.get('round_trips', '-')}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Looped versus bulk fan-out transfers")
+    parser.add_argument("--backend", default="memory", choices=["memory", "emulator"])
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--loop-recipients", type=int, default=200,
+                        help="recipients for the slow transfer_money loop (throughput is per transfer)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=5, help="memory backend only")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bs = BankingSystem(args.backend)
+    # seed() gives every account a balance of 1e12, so the first is the treasury
+    (treasury, *recipients), _ = seed(bs, args.recipients + 1, 0)
+    if args.backend == "memory":
+        bs.db.latency = args.latency_ms / 1000
+
+    def loop(transfers):
+        return sum(bs.transfer_money(treasury, to_acc, amount)[0] for to_acc, amount in transfers)
+
+    def bulk(transfers):
+        return sum(ok for ok, _ in bs.transfer_money_bulk(treasury, transfers, max_workers=args.workers))
+
+    results = {
+        "backend": args.backend,
+        "latency_ms": args.latency_ms if args.backend == "memory" else None,
+        "loop": run(bs, "loop", loop, [(r, 10.0) for r in recipients[:args.loop_recipients]]),
+        "bulk": run(bs, "bulk", bulk, [(r, 10.0) for r in recipients]),
+    }
+    results["speedup"] = results["bulk"]["transfers_per_second"] / results["loop"]["transfers_per_second"]
+    print(f"speedup: {results['speedup']:.1f}x")
+    bs.password_hasher.shutdown()
+    print("Results written to", write_results("bulk_transfers", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/columnar_fetch.py
+# Peak memory and time of fetching one account's full history and building
+# the History tab analytics from it: get_transaction_history (a list of dicts)
+# versus get_transaction_columns (compact columns), against the memory store.
+#
+#     python -m benchmarks.columnar_fetch --transactions 1000000
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+import analytics
+from Firebase_code import BankingSystem
+from benchmarks.common import write_results
+from benchmarks.run_benchmarks import seed
+
+FETCHES = {
+    "dicts": lambda bs, account_no: bs.get_transaction_history(account_no),
+    "columns": lambda bs, account_no: bs.get_transaction_columns(account_no).to_frame(),
+}
+
+
+def measure(name, transactions):
+    # Runs in a fresh process so ru_maxrss only covers this fetch; the growth
+    # of peak RSS past the seeded store is the fetch's peak memory
+    bs = BankingSystem("memory")
+    _, merchant = seed(bs, 1, transactions)
+    analytics.summarize_transactions([])
+    gc.collect()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    fetched = FETCHES[name](bs, merchant)
+    fetch_seconds = time.perf_counter() - start
+    _, expenses, monthly = analytics.summarize_transactions(fetched)
+    total_seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "rows": len(fetched),
+        "fetch_seconds": fetch_seconds,
+        "fetch_and_summarize_seconds": total_seconds,
+        "peak_rss_growth_mb": (rss_after - rss_before) / 1024,
+        "expenses_total": float(expenses.sum()),
+        "monthly_total": float(monthly.to_numpy().sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row versus columnar history fetch")
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--output")
+    parser.add_argument("--fetch", choices=list(FETCHES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fetch:
+        print(json.dumps(measure(args.fetch, args.transactions)))
+        return
+
+    results = {"transactions": args.transactions}
+    for name in FETCHES:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.columnar_fetch", "--transactions",
+             str(args.transactions), "--fetch", name],
+            capture_output=True, text=True, check=True
+        )
+        results[name] = json.loads(proc.stdout.splitlines()[-1])
+        r = results[name]
+        print(f"{name:>8}: {r['rows']} rows  fetch {r['fetch_seconds']:7.2f} s  "
+              f"fetch + summarize {r['fetch_and_summarize_seconds']:7.2f} s  "
+              f"peak +{r['peak_rss_growth_mb']:8.1f} MB")
+    for key in ("rows", "expenses_total", "monthly_total"):
+        if results["dicts"][key] != results["columns"][key]:
+            raise AssertionError(f"Fetches disagree on {key}")
+    print("Results written to", write_results("columnar_fetch", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
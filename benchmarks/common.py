@@ -0,0 +1,44 @@
+# benchmarks/common.py
+# Shared helpers for the standalone benchmark scripts in this package.
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered) if ordered else None,
+        "p50_ms": 1000 * percentile(ordered, 50) if ordered else None,
+        "p95_ms": 1000 * percentile(ordered, 95) if ordered else None,
+        "p99_ms": 1000 * percentile(ordered, 99) if ordered else None,
+    }
+
+
+def write_results(name, results, path=None):
+    # One JSON document per run, so results can be diffed between commits
+    path = path or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        "benchmark": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
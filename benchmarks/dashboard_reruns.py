@@ -0,0 +1,80 @@
+# benchmarks/dashboard_reruns.py
+# Reruns per second of the logged-in dashboard, per selected section, using
+# Streamlit's AppTest harness against the in-memory store. --script runs an
+# older copy of main.py for before/after comparisons, e.g.
+#
+#     git show HEAD~1:main.py > /tmp/main_before.py
+#     python -m benchmarks.dashboard_reruns --script /tmp/main_before.py
+#     python -m benchmarks.dashboard_reruns
+import argparse
+import os
+import time
+
+os.environ["BANKING_BACKEND"] = "memory"
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+from streamlit.testing.v1 import AppTest
+
+from Firebase_code import BankingSystem
+from benchmarks.common import latency_summary, write_results
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+SECTIONS = ["Deposit / Withdraw", "Transfer", "Loans", "History"]
+
+
+def seed(transactions, loans):
+    bs = BankingSystem("memory")
+    account_no = bs.create_account("Bench", "bench-password", f"{time.time_ns()}@bench.example")
+    for i in range(transactions):
+        if i % 3:
+            bs.record_transaction(account_no, "deposit", 100.0, "Salary")
+        else:
+            bs.record_transaction(account_no, "withdraw", 10.0, "Bills")
+    for _ in range(loans):
+        bs.apply_for_loan(account_no, 10_000, 12, 10)
+    return account_no
+
+
+def measure(script, account_no, section, reruns):
+    at = AppTest.from_file(script, default_timeout=60)
+    at.session_state["logged_in"] = True
+    at.session_state["account_no"] = account_no
+    at.session_state["dashboard_section"] = section
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    latencies = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+    return {"reruns_per_second": reruns / sum(latencies), **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard reruns per second")
+    parser.add_argument("--script", default=MAIN_SCRIPT)
+    parser.add_argument("--transactions", type=int, default=200)
+    parser.add_argument("--loans", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    account_no = seed(args.transactions, args.loans)
+    results = {
+        "script": os.path.abspath(args.script),
+        "transactions": args.transactions,
+        "loans": args.loans,
+        "sections": {},
+    }
+    for section in SECTIONS:
+        result = measure(args.script, account_no, section, args.reruns)
+        results["sections"][section] = result
+        print(f"{section:>20}: {result['reruns_per_second']:8.1f} reruns/s  "
+              f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms")
+    print("Results written to", write_results("dashboard_reruns", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/history_analytics.py
+# Wall time, CPU time and peak memory of building the History tab's table,
+# expenses by category and monthly summary from raw transactions: the
+# original pipeline (parse twice, .replace, strftime per row, group twice)
+# versus analytics.summarize_transactions.
+#
+#     python -m benchmarks.history_analytics --rows 1000000
+import argparse
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+import analytics
+from benchmarks.common import write_results
+
+TYPES = ["deposit", "withdraw", "transfer_in", "transfer_out", "loan_disbursement", "loan_payment"]
+CATEGORIES = ["Salary", "Other", "Bills", "Shopping", "Transfer", "Loan"]
+
+
+def make_transactions(rows):
+    # Fixed start, so both pipeline processes see identical data
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "account_no": "1000000009",
+        "transaction_type": TYPES[i % len(TYPES)],
+        "amount": float(i % 1000),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "recipient_account": "2000000008" if i % 6 in (2, 3) else None,
+        "timestamp": (now - timedelta(minutes=i)).isoformat(),
+    } for i in range(rows)]
+
+
+def legacy_pipeline(transactions):
+    df = pd.DataFrame(transactions)
+    df['Timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', utc=True, format='ISO8601')
+    df.rename(columns={
+        "transaction_type": "Type",
+        "amount": "Amount",
+        "category": "Category",
+        "recipient_account": "Transfer Account"
+    }, inplace=True)
+    table = df.drop(columns=["Timestamp"], errors='ignore')
+
+    expenses_by_category = df[df['Type'] == 'withdraw'].groupby('Category')['Amount'].sum()
+
+    df['Timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', utc=True, format='ISO8601')
+    df = df.dropna(subset=['Timestamp'])
+    df['Type'] = df['Type'].str.lower()
+    df['Type'] = df['Type'].replace({
+        'loan_disbursement': 'deposit',
+        'loan_payment': 'withdraw'
+    })
+    df['Month'] = df['Timestamp'].dt.strftime('%Y-%m')
+    monthly_summary = df.groupby(['Month', 'Type'])['Amount'].sum().unstack(fill_value=0)
+    return table, expenses_by_category, monthly_summary
+
+
+PIPELINES = {"legacy": legacy_pipeline, "vectorized": analytics.summarize_transactions}
+
+
+def measure(name, rows, repeat):
+    # Runs in a fresh process so ru_maxrss only covers this pipeline; the
+    # growth of peak RSS past the input list is the pipeline's peak memory
+    transactions = make_transactions(rows)
+    gc.collect()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = PIPELINES[name](transactions)
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    table, expenses, monthly = result
+    return {
+        "wall_seconds": min(walls),
+        "cpu_seconds": min(cpus),
+        "peak_rss_growth_mb": (rss_after - rss_before) / 1024,
+        "table_mb": table.memory_usage(deep=True).sum() / 2 ** 20,
+        "expenses": expenses.astype(float).to_dict(),
+        "monthly": monthly[["deposit", "withdraw"]].to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History tab analytics pipelines")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(json.dumps(measure(args.pipeline, args.rows, args.repeat)))
+        return
+
+    results = {"rows": args.rows}
+    for name in PIPELINES:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.history_analytics", "--rows", str(args.rows),
+             "--repeat", str(args.repeat), "--pipeline", name],
+            capture_output=True, text=True, check=True
+        )
+        results[name] = json.loads(proc.stdout.splitlines()[-1])
+
+    # Same totals for the series the charts draw (up to summation order)
+    for key in ("expenses", "monthly"):
+        legacy = pd.json_normalize(results["legacy"].pop(key)).iloc[0]
+        vectorized = pd.json_normalize(results["vectorized"].pop(key)).iloc[0]
+        pd.testing.assert_series_equal(legacy.sort_index(), vectorized.sort_index(), rtol=1e-9)
+
+    for name in ("legacy", "vectorized"):
+        r = results[name]
+        print(f"{name:>10}: {r['wall_seconds']:7.2f} s wall  {r['cpu_seconds']:7.2f} s cpu  "
+              f"peak +{r['peak_rss_growth_mb']:8.1f} MB  table {r['table_mb']:8.1f} MB")
+    print("Results written to", write_results("history_analytics", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/password_hashing.py
+# Password verifications per second at different KDF cost settings, inline on
+# one core and through the PasswordHasher thread pool.
+#
+#     python -m benchmarks.password_hashing --logins 50 --workers 4
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import passwords
+from benchmarks.common import write_results
+
+SETTINGS = [
+    ("sha256 (legacy)", None, {}),
+    ("pbkdf2_sha256 100k", "pbkdf2_sha256", {"pbkdf2_iterations": 100_000}),
+    ("pbkdf2_sha256 600k", "pbkdf2_sha256", {"pbkdf2_iterations": 600_000}),
+    ("scrypt n=2^13", "scrypt", {"scrypt_n": 2 ** 13}),
+    ("scrypt n=2^14", "scrypt", {"scrypt_n": 2 ** 14}),
+    ("scrypt n=2^15", "scrypt", {"scrypt_n": 2 ** 15}),
+]
+
+
+def verifications_per_second(hasher, stored, logins, threads):
+    # Login threads submit concurrently, as Streamlit sessions would
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda _: hasher.verify("correct horse", stored)[0], range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashing benchmark")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    inline = passwords.PasswordHasher(workers=0)
+    pooled = passwords.PasswordHasher(workers=args.workers)
+    pooled.verify("warm", passwords.hash_password("warm", "pbkdf2_sha256", pbkdf2_iterations=1))
+
+    results = {"workers": args.workers, "logins": args.logins, "settings": []}
+    for label, method, cost in SETTINGS:
+        if method is None:
+            stored = hashlib.sha256(b"correct horse").hexdigest()
+        else:
+            stored = passwords.hash_password("correct horse", method, **cost)
+        single = verifications_per_second(inline, stored, args.logins, 1)
+        pool = verifications_per_second(pooled, stored, args.logins, args.workers * 2)
+        results["settings"].append({
+            "setting": label,
+            "logins_per_second_one_core": single,
+            "logins_per_second_pool": pool,
+            "logins_per_second_per_core_pool": pool / args.workers,
+        })
+        print(f"{label:>20}: {single:10.1f}/s inline, {pool:10.1f}/s with {args.workers} workers")
+    pooled.shutdown()
+    print("Results written to", write_results("password_hashing", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
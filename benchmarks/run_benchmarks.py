@@ -0,0 +1,148 @@
+# benchmarks/run_benchmarks.py
+# Throughput, latency percentiles and round trips per call for every
+# BankingSystem operation, against the in-memory store or a Firestore emulator.
+#
+#     python -m benchmarks.run_benchmarks --transactions 100000 --concurrency 8
+#     FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.run_benchmarks --backend emulator
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from Firebase_code import BankingSystem
+from benchmarks.common import latency_summary, write_results
+
+PASSWORD = "bench-password"
+BATCH_LIMIT = 500
+
+
+def seed(bs, accounts, transactions):
+    # Written directly in batches: going through create_account would make
+    # seeding as slow as the password hashing it is not trying to measure.
+    password_hash = bs.hash_password(PASSWORD)
+    account_nos = [bs.account_numbers.allocate() for _ in range(accounts + 1)]
+    merchant = account_nos.pop()
+    now = datetime.now(timezone.utc)
+
+    def commit_in_batches(docs):
+        for i in range(0, len(docs), BATCH_LIMIT):
+            batch = bs.db.batch()
+            for ref, data in docs[i:i + BATCH_LIMIT]:
+                batch.set(ref, data)
+            batch.commit()
+
+    commit_in_batches([
+        (bs.db.collection("accounts").document(account_no), {
+            "name": f"Bench {account_no}",
+            "password": password_hash,
+            "email": f"{account_no}@bench.example",
+            "balance": 1e12,
+            "created_at": now.isoformat()
+        })
+        for account_no in account_nos + [merchant]
+    ])
+    for start in range(0, transactions, 50_000):
+        commit_in_batches([
+            (bs.db.collection("transactions").document(), {
+                "account_no": merchant,
+                "transaction_type": "deposit" if i % 3 else "withdraw",
+                "amount": float(i % 1000),
+                "category": "Salary" if i % 3 else "Bills",
+                "recipient_account": None,
+                "timestamp": (now - timedelta(minutes=i)).isoformat()
+            })
+            for i in range(start, min(start + 50_000, transactions))
+        ])
+    return account_nos, merchant
+
+
+def make_operations(bs, account_nos, merchant, iterations):
+    pick = random.Random(42).choice
+    loan_ids = []
+
+    def prepare_loans():
+        for _ in range(iterations):
+            bs.apply_for_loan(pick(account_nos), 100_000, 12, 10)
+        for account_no in account_nos:
+            loan_ids.extend(loan["loan_id"] for loan in bs.get_active_loans(account_no))
+
+    return {
+        "create_account": (None, lambda i: bs.create_account(
+            "Bench", PASSWORD, f"new-{i}-{time.time_ns()}@bench.example")),
+        "validate_login": (None, lambda i: bs.validate_login(pick(account_nos), PASSWORD)),
+        "record_transaction_deposit": (None, lambda i: bs.record_transaction(
+            pick(account_nos), "deposit", 10.0, "Salary")),
+        "record_transaction_withdraw": (None, lambda i: bs.record_transaction(
+            pick(account_nos), "withdraw", 1.0, "Bills")),
+        "transfer_money": (None, lambda i: bs.transfer_money(
+            account_nos[i % len(account_nos)], account_nos[(i + 1) % len(account_nos)], 1.0)),
+        "apply_for_loan": (None, lambda i: bs.apply_for_loan(pick(account_nos), 5000, 12, 10)),
+        "make_loan_payment": (prepare_loans, lambda i: bs.make_loan_payment(
+            loan_ids[i % len(loan_ids)], 1.0)),
+        "get_accounts_50": (None, lambda i: bs.get_accounts(account_nos[:50])),
+        "get_transaction_history": (None, lambda i: bs.get_transaction_history(merchant)),
+        "get_transaction_history_page": (None, lambda i: bs.get_transaction_history_page(merchant)),
+    }
+
+
+def run_operation(bs, call, iterations, concurrency):
+    def timed(i):
+        start = time.perf_counter()
+        call(i)
+        return time.perf_counter() - start
+
+    stats_before = bs.db.stats() if hasattr(bs.db, "stats") else None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    result = {"ops_per_second": iterations / elapsed, **latency_summary(latencies)}
+    if stats_before is not None:
+        stats_after = bs.db.stats()
+        for name in stats_after:
+            result[f"{name}_per_call"] = (stats_after[name] - stats_before[name]) / iterations
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BankingSystem operation benchmarks")
+    parser.add_argument("--backend", default="memory", choices=["memory", "emulator"])
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1000,
+                        help="history size of the account used by the history benchmarks")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--history-iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="operation names to run")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bs = BankingSystem(args.backend)
+    account_nos, merchant = seed(bs, args.accounts, args.transactions)
+    operations = make_operations(bs, account_nos, merchant, args.iterations)
+
+    results = {
+        "backend": args.backend,
+        "accounts": args.accounts,
+        "transactions": args.transactions,
+        "concurrency": args.concurrency,
+        "operations": {},
+    }
+    for name, (setup, call) in operations.items():
+        if args.only and name not in args.only:
+            continue
+        if setup:
+            setup()
+        iterations = args.history_iterations if name.startswith("get_transaction") else args.iterations
+        result = run_operation(bs, call, iterations, args.concurrency)
+        results["operations"][name] = result
+        print(f"{name:>30}: {result['ops_per_second']:10.1f} ops/s  p50 {result['p50_ms']:8.3f} ms  "
+              f"p99 {result['p99_ms']:8.3f} ms  round trips {result.get('round_trips_per_call', '-')}")
+    bs.password_hasher.shutdown()
+    print("Results written to", write_results("operations", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
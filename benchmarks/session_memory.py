@@ -0,0 +1,54 @@
+# benchmarks/session_memory.py
+# Memory held per Streamlit session when every session builds its own
+# BankingSystem versus all sessions sharing one cached instance.
+#
+#     python -m benchmarks.session_memory --sessions 500
+import argparse
+import gc
+import tracemalloc
+
+from Firebase_code import BankingSystem
+from benchmarks.common import write_results
+
+
+def measure(sessions, backend, shared):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    shared_system = BankingSystem(backend) if shared else None
+    session_states = []
+    for i in range(sessions):
+        state = {"logged_in": True, "account_no": f"{i:08d}", "user_name": "Bench"}
+        if not shared:
+            state["banking_system"] = BankingSystem(backend)
+        session_states.append(state)
+
+    gc.collect()
+    stats = tracemalloc.take_snapshot().compare_to(baseline, "filename")
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in stats)
+    del shared_system, session_states
+    return {"total_bytes": total, "bytes_per_session": total / sessions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session BankingSystem memory")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--backend", default="memory")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {
+        "sessions": args.sessions,
+        "backend": args.backend,
+        "per_session_instance": measure(args.sessions, args.backend, shared=False),
+        "shared_instance": measure(args.sessions, args.backend, shared=True),
+    }
+    for mode in ("per_session_instance", "shared_instance"):
+        print(f"{mode:>22}: {results[mode]['bytes_per_session']:10.1f} bytes/session")
+    print("Results written to", write_results("session_memory", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
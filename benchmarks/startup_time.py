@@ -0,0 +1,82 @@
+# benchmarks/startup_time.py
+# Cold-start import cost of the app modules, measured with python -X importtime
+# in fresh interpreters and reported as JSON for comparison between commits.
+#
+#     python -m benchmarks.startup_time --repeat 5
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import write_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["Firebase_code", "main"]
+
+
+def parse_importtime(stderr, target):
+    # Lines look like "import time: self [us] | cumulative | imported package",
+    # children before their parent and indented two spaces per level. Returns
+    # the target's total and the cumulative cost of each of its direct imports.
+    total, children, pending = 0, {}, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == target:
+                total, children = int(cumulative), pending
+            pending = {}
+    return total, children
+
+
+def measure(target, backend):
+    env = dict(os.environ, BANKING_BACKEND=backend)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    return (wall, *parse_importtime(proc.stderr, target))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", default="memory")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {"backend": args.backend, "repeat": args.repeat, "targets": {}}
+    for target in TARGETS:
+        runs = [measure(target, args.backend) for _ in range(args.repeat)]
+        imports = {}
+        for _, _, children in runs:
+            for name, us in children.items():
+                imports.setdefault(name, []).append(us)
+        heaviest = sorted(
+            ((name, statistics.median(us)) for name, us in imports.items()),
+            key=lambda item: item[1], reverse=True,
+        )[:args.top]
+        results["targets"][target] = {
+            "wall_seconds_median": statistics.median(wall for wall, _, _ in runs),
+            "import_seconds_median": statistics.median(total / 1e6 for _, total, _ in runs),
+            "heaviest_imports_ms": {name: us / 1000 for name, us in heaviest},
+        }
+        summary = results["targets"][target]
+        print(f"{target:>14}: {summary['import_seconds_median']:.3f}s imports, "
+              f"{summary['wall_seconds_median']:.3f}s wall")
+        for name, ms in summary["heaviest_imports_ms"].items():
+            print(f"{'':>16}{name:<30}{ms:8.1f} ms")
+    print("Results written to", write_results("startup_time", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/transaction_cache.py
+# Firestore reads and latency of repeated History loads with and without the
+# on-disk transaction cache: each round records a few new transactions and
+# then loads the account's full history again.
+#
+#     python -m benchmarks.transaction_cache --transactions 100000 --rounds 10
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("BANKING_PASSWORD_WORKERS", "0")
+
+from Firebase_code import BankingSystem
+from benchmarks.common import latency_summary, write_results
+from benchmarks.run_benchmarks import seed
+from transaction_cache import TransactionCache
+
+
+def measure(bs, account_no, rounds, new_per_round):
+    reads, latencies = [], []
+    for i in range(rounds + 1):
+        # Round 0 is the cold load
+        if i:
+            for _ in range(new_per_round):
+                bs.record_transaction(account_no, "deposit", 1.0, "Salary")
+        before = bs.db.stats()["reads"]
+        start = time.perf_counter()
+        txns = bs.get_transaction_history(account_no)
+        latencies.append(time.perf_counter() - start)
+        reads.append(bs.db.stats()["reads"] - before)
+    return {
+        "rows": len(txns),
+        "cold_reads": reads[0],
+        "cold_seconds": latencies[0],
+        "warm_reads_per_load": sum(reads[1:]) / rounds,
+        **latency_summary(latencies[1:]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History loads with the transaction cache")
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--new-per-round", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bs = BankingSystem("memory")
+    _, merchant = seed(bs, 1, args.transactions)
+    results = {
+        "transactions": args.transactions,
+        "rounds": args.rounds,
+        "new_per_round": args.new_per_round,
+        "uncached": measure(bs, merchant, args.rounds, args.new_per_round),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        bs.transaction_cache = TransactionCache(os.path.join(tmp, "transactions.db"))
+        results["cached"] = measure(bs, merchant, args.rounds, args.new_per_round)
+        bs.transaction_cache.close()
+
+    for mode in ("uncached", "cached"):
+        r = results[mode]
+        print(f"{mode:>8}: cold {r['cold_reads']} reads {r['cold_seconds']:7.2f} s  "
+              f"warm {r['warm_reads_per_load']:9.1f} reads/load  p50 {r['p50_ms']:9.2f} ms")
+    print("Results written to", write_results("transaction_cache", results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# columnar.py
+# Transaction history as compact columns, filled while documents stream in
+# rather than kept as a list of dicts: float64 amounts, int64 UTC timestamps
+# (microseconds since the epoch) and dictionary-encoded types and categories.
+# The columns are stdlib arrays, exposed to NumPy and pandas without copying;
+# to_arrow() needs pyarrow, which is optional.
+import array
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# numpy reads the smallest int64 as NaT
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+class DictionaryColumn:
+    # Stores each distinct value once; codes index into values, -1 is None
+    def __init__(self):
+        self.codes = array.array("i")
+        self.values = []
+        self._codes_by_value = {}
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+def _timestamp_micros(value):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return MISSING_TIMESTAMP
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - EPOCH) // MICROSECOND
+
+
+class TransactionColumns:
+    def __init__(self):
+        self.amount = array.array("d")
+        self.timestamp = array.array("q")
+        self.transaction_type = DictionaryColumn()
+        self.category = DictionaryColumn()
+        self.recipient_account = []
+
+    def __len__(self):
+        return len(self.amount)
+
+    def append(self, txn):
+        amount = txn.get("amount")
+        self.amount.append(float("nan") if amount is None else amount)
+        self.timestamp.append(_timestamp_micros(txn.get("timestamp")))
+        self.transaction_type.append(txn.get("transaction_type"))
+        self.category.append(txn.get("category"))
+        self.recipient_account.append(txn.get("recipient_account"))
+
+    def extend(self, txns):
+        for txn in txns:
+            self.append(txn)
+        return self
+
+    # NumPy views over the columns: (codes, values) for the encoded ones
+    def arrays(self):
+        return {
+            "transaction_type": (np.frombuffer(self.transaction_type.codes, dtype=np.int32),
+                                 self.transaction_type.values),
+            "amount": np.frombuffer(self.amount, dtype=np.float64),
+            "category": (np.frombuffer(self.category.codes, dtype=np.int32), self.category.values),
+            "recipient_account": np.array(self.recipient_account, dtype=object),
+            "timestamp": np.frombuffer(self.timestamp, dtype=np.int64).view("datetime64[us]"),
+        }
+
+    # Same column names as the Firestore documents, for analytics.summarize_transactions
+    def to_frame(self):
+        import pandas as pd
+
+        columns = self.arrays()
+        for name in ("transaction_type", "category"):
+            codes, values = columns[name]
+            columns[name] = pd.Categorical.from_codes(codes, categories=values)
+        columns["timestamp"] = pd.Series(
+            columns["timestamp"], dtype=pd.DatetimeTZDtype("us", "UTC"), copy=False
+        )
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("to_arrow() requires pyarrow: pip install pyarrow")
+
+        columns = self.arrays()
+        for name in ("transaction_type", "category"):
+            codes, values = columns[name]
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0), pa.array(values, type=pa.string())
+            )
+        columns["timestamp"] = pa.array(
+            columns["timestamp"].view(np.int64), type=pa.timestamp("us", tz="UTC"),
+            mask=columns["timestamp"].view(np.int64) == MISSING_TIMESTAMP
+        )
+        return pa.table(columns)
@@ -1,18 +1,61 @@
+import asyncio
+import time
+import uuid
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from async_banking import AsyncBankingSystem
 from Firebase_code import BankingSystem
 
+# analytics (pandas) and plotly are imported inside the History tab: they take
+# most of a second to load and most reruns (including the login screen) never
+# need them.
+
 st.set_page_config(page_title="SecureBank System", layout="wide")
 
-if 'banking_system' not in st.session_state:
-    st.session_state.banking_system = BankingSystem()
+# One BankingSystem (and Firestore client) shared by every session in the
+# process; session state only holds who is logged in.
+@st.cache_resource
+def get_banking_system():
+    return BankingSystem()
 
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
-bs = st.session_state.banking_system
+bs = get_banking_system()
+
+HISTORY_PAGE_SIZE = 50
+LIVE_REFRESH_SECONDS = 2
+PREFETCH_TTL_SECONDS = 60
+
+def reset_history():
+    # Drop loaded history pages and anything prefetched at login so the
+    # dashboard refetches from the newest entry
+    st.session_state.pop("history", None)
+    st.session_state.pop("prefetch", None)
+
+def prefetch_dashboard(account_no):
+    # Fetches what the dashboard sections show concurrently right after login,
+    # so the first paint waits for the slowest query instead of all of them
+    data = asyncio.run(AsyncBankingSystem(bs).get_dashboard(account_no, HISTORY_PAGE_SIZE))
+    st.session_state.history = data.pop("history")
+    st.session_state.prefetch = {"fetched_at": time.monotonic(), **data}
+
+def prefetched(key):
+    # Each prefetched value is used once, and only while it is recent
+    prefetch = st.session_state.get("prefetch")
+    if prefetch is None or time.monotonic() - prefetch["fetched_at"] > PREFETCH_TTL_SECONDS:
+        return None
+    return prefetch.pop(key, None)
+
+def submission_key(form, submitted):
+    # Idempotency key for a money-moving form. It is kept across reruns that
+    # submit the form (a double click or resent rerun reuses it, so the banking
+    # system returns the first result) and replaced on any rerun that renders
+    # the form without submitting it.
+    name = f"idempotency_key_{form}"
+    if not submitted or name not in st.session_state:
+        st.session_state[name] = uuid.uuid4().hex
+    return st.session_state[name]
 
 def login_screen():
     st.title("SecureBank Login")
@@ -30,6 +73,8 @@ def login_screen():
                     st.session_state.logged_in = True
                     st.session_state.account_no = account_no
                     st.session_state.user_name = user[1]
+                    reset_history()
+                    prefetch_dashboard(account_no)
                     st.rerun()
                 else:
                     st.error("Invalid credentials")
@@ -52,9 +97,17 @@ def login_screen():
                     except Exception as e:
                         st.error(str(e))
 
-def dashboard():
-    st.button("Logout", on_click=lambda: st.session_state.update({"logged_in": False}))
-    name, email, balance, created_at = bs.get_user_details(st.session_state.account_no)
+def logout():
+    # The account's live view is shared with its other sessions (tabs), so it
+    # is left to close itself once nobody has read it for listener_idle seconds
+    st.session_state.update({"logged_in": False})
+
+# With listeners on, the summary reads the account's live view and refreshes
+# itself, so incoming transfers show up without the user clicking anything
+@st.fragment(run_every=LIVE_REFRESH_SECONDS if bs.listeners else None)
+def account_summary():
+    details = prefetched("details") or bs.get_user_details(st.session_state.account_no)
+    name, email, balance, created_at = details
 
     st.title(f"Welcome, {name}")
     col1, col2, col3 = st.columns(3)
@@ -62,8 +115,19 @@ def dashboard():
     col2.metric("Account No", st.session_state.account_no)
     col3.metric("Since", created_at.split("T")[0])
 
+def dashboard():
+    if bs.listeners:
+        bs.watch_account(st.session_state.account_no, HISTORY_PAGE_SIZE)
+    st.button("Logout", on_click=logout)
+    account_summary()
+
     st.subheader("Banking Services")
-    tabs = st.tabs(["Deposit / Withdraw", "Transfer", "Loans", "History"])
+    # Unlike st.tabs, which runs every tab's body on each rerun, only the
+    # selected section fetches data and builds its charts
+    section = st.radio(
+        "Section", list(SECTIONS), key="dashboard_section",
+        horizontal=True, label_visibility="collapsed"
+    )
 
     # Initialize flags for deposit and withdraw
     if 'deposit_success' not in st.session_state:
@@ -92,221 +156,254 @@ def dashboard():
     if 'loan_pay_error' not in st.session_state:
         st.session_state.loan_pay_error = {}
 
-    with tabs[0]:
-        col1, col2 = st.columns(2)
-
-        # Deposit form
-        with col1.form("deposit_form"):
-            amt = st.number_input("Deposit ₹", min_value=0.01)
-            cat = st.selectbox("Category", ["Salary", "Other"])
-            if st.form_submit_button("Deposit"):
-                if bs.record_transaction(st.session_state.account_no, "deposit", amt, cat):
-                    st.session_state.deposit_success = True
-                    st.session_state.deposit_error = ""
-                    st.rerun()
-                else:
-                    st.session_state.deposit_error = "Deposit failed"
-                    st.session_state.deposit_success = False
-                    st.rerun()
-
-        if st.session_state.deposit_success:
-            st.success("Deposit successful")
-            st.session_state.deposit_success = False
-        if st.session_state.deposit_error:
-            st.error(st.session_state.deposit_error)
-            st.session_state.deposit_error = ""
-
-        # Withdraw form
-        with col2.form("withdraw_form"):
-            amt = st.number_input("Withdraw ₹", min_value=0.01)
-            cat = st.selectbox("Category", ["Bills", "Shopping"])
-            if st.form_submit_button("Withdraw"):
-                if bs.record_transaction(st.session_state.account_no, "withdraw", amt, cat):
-                    st.session_state.withdraw_success = True
-                    st.session_state.withdraw_error = ""
-                    st.rerun()
-                else:
-                    st.session_state.withdraw_error = "Insufficient funds"
-                    st.session_state.withdraw_success = False
-                    st.rerun()
+    SECTIONS[section]()
+
+def deposit_withdraw_section():
+    col1, col2 = st.columns(2)
+
+    # Deposit form
+    with col1.form("deposit_form"):
+        amt = st.number_input("Deposit ₹", min_value=0.01)
+        cat = st.selectbox("Category", ["Salary", "Other"])
+        submitted = st.form_submit_button("Deposit")
+        key = submission_key("deposit_form", submitted)
+        if submitted:
+            if bs.record_transaction(st.session_state.account_no, "deposit", amt, cat,
+                                     idempotency_key=key):
+                st.session_state.deposit_success = True
+                reset_history()
+                st.session_state.deposit_error = ""
+                st.rerun()
+            else:
+                st.session_state.deposit_error = "Deposit failed"
+                st.session_state.deposit_success = False
+                st.rerun()
 
-        if st.session_state.withdraw_success:
-            st.success("Withdraw successful")
-            st.session_state.withdraw_success = False
-        if st.session_state.withdraw_error:
-            st.error(st.session_state.withdraw_error)
-            st.session_state.withdraw_error = ""
+    if st.session_state.deposit_success:
+        st.success("Deposit successful")
+        st.session_state.deposit_success = False
+    if st.session_state.deposit_error:
+        st.error(st.session_state.deposit_error)
+        st.session_state.deposit_error = ""
 
-    with tabs[1]:
-        with st.form("transfer_form"):
-            to_acc = st.text_input("To Account No").strip().upper()
-            amt = st.number_input("Amount ₹", min_value=0.01)
-            if st.form_submit_button("Transfer"):
-                success, msg = bs.transfer_money(st.session_state.account_no, to_acc, amt)
-                if success:
-                    st.session_state.transfer_success = True
-                    st.session_state.transfer_error = ""
-                else:
-                    st.session_state.transfer_error = msg
-                    st.session_state.transfer_success = False
+    # Withdraw form
+    with col2.form("withdraw_form"):
+        amt = st.number_input("Withdraw ₹", min_value=0.01)
+        cat = st.selectbox("Category", ["Bills", "Shopping"])
+        submitted = st.form_submit_button("Withdraw")
+        key = submission_key("withdraw_form", submitted)
+        if submitted:
+            if bs.record_transaction(st.session_state.account_no, "withdraw", amt, cat,
+                                     idempotency_key=key):
+                st.session_state.withdraw_success = True
+                reset_history()
+                st.session_state.withdraw_error = ""
                 st.rerun()
-
-        if st.session_state.transfer_success:
-            st.success("Transfer successful")
-            st.session_state.transfer_success = False
-        if st.session_state.transfer_error:
-            st.error(st.session_state.transfer_error)
-            st.session_state.transfer_error = ""
-
-    with tabs[2]:
-        col1, col2 = st.columns(2)
-
-        with col1.form("loan_form"):
-            amt = st.number_input("Loan Amount ₹", min_value=1000.0)
-            months = st.selectbox("Term (months)", [12, 24, 36])
-            rate = st.slider("Interest %", min_value=5.0, max_value=15.0, value=10.0)
-            if st.form_submit_button("Apply"):
-                success, msg = bs.apply_for_loan(st.session_state.account_no, amt, months, rate)
-                if success:
-                    st.session_state.loan_success = True
-                    st.session_state.loan_error = ""
-                else:
-                    st.session_state.loan_error = msg
-                    st.session_state.loan_success = False
+            else:
+                st.session_state.withdraw_error = "Insufficient funds"
+                st.session_state.withdraw_success = False
                 st.rerun()
 
-        if st.session_state.loan_success:
-            st.success("Loan application successful")
-            st.session_state.loan_success = False
-        if st.session_state.loan_error:
-            st.error(st.session_state.loan_error)
-            st.session_state.loan_error = ""
+    if st.session_state.withdraw_success:
+        st.success("Withdraw successful")
+        st.session_state.withdraw_success = False
+    if st.session_state.withdraw_error:
+        st.error(st.session_state.withdraw_error)
+        st.session_state.withdraw_error = ""
 
-        with col2:
-            loans = bs.get_active_loans(st.session_state.account_no)
-            for loan in loans:
-                with st.expander(f"Loan ₹{loan['amount']}"):
-                    st.write(f"Monthly: ₹{loan['monthly_payment']:.2f}")
-                    st.write(f"Remaining: ₹{loan['remaining_amount']:.2f}")
-
-                    form_key = f"pay_loan_{loan['loan_id']}"
-                    with st.form(form_key):
-                        pay_amt = st.number_input(
-                            "Pay Amount ₹",
-                            min_value=0.01,
-                            max_value=loan["remaining_amount"],
-                            key=f"pay_amt_{loan['loan_id']}"
-                        )
-                        if st.form_submit_button("Pay"):
-                            success, msg = bs.make_loan_payment(loan["loan_id"], pay_amt)
-                            # Store flags in dict by loan_id
-                            st.session_state.loan_pay_success[loan['loan_id']] = success
-                            if not success:
-                                st.session_state.loan_pay_error[loan['loan_id']] = msg
-                            else:
-                                st.session_state.loan_pay_error[loan['loan_id']] = ""
-                            st.rerun()
-
-                    # Show messages for each loan payment
-                    if st.session_state.loan_pay_success.get(loan['loan_id'], False):
-                        st.success("Loan payment successful")
-                        st.session_state.loan_pay_success[loan['loan_id']] = False
-                    if st.session_state.loan_pay_error.get(loan['loan_id'], ""):
-                        st.error(st.session_state.loan_pay_error[loan['loan_id']])
-                        st.session_state.loan_pay_error[loan['loan_id']] = ""
-
-    with tabs[3]:
-        transactions = bs.get_transaction_history(st.session_state.account_no)
-        
-        if transactions:
-            df = pd.DataFrame(transactions)
-
-            # Convert timestamp string to datetime UTC
-            df['Timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', utc=True)
-            
-            df.rename(columns={
-                "transaction_type": "Type",
-                "amount": "Amount",
-                "category": "Category",
-                "recipient_account": "Transfer Account"
-            }, inplace=True)
-
-            tab1, tab2, tab3 = st.tabs([
-                "Transaction History",
-                "Category Analysis",
-                "Monthly Trends"
-            ])
-
-            with tab1:
-                st.dataframe(df.drop(columns=["Timestamp"], errors='ignore'))
-
-            with tab2:
-                expenses_by_category = df[df['Type'] == 'withdraw'].groupby('Category')['Amount'].sum()
-
-                if not expenses_by_category.empty:
-                    fig = px.pie(
-                        values=expenses_by_category.values,
-                        names=expenses_by_category.index,
-                        title='Expenses by Category'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No expense data available yet")
-
-            with tab3:
-                # Parse timestamp
-                df['Timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', utc=True)
-                df = df.dropna(subset=['Timestamp'])  # remove rows with invalid dates
-
-                # Normalize and map transaction types
-                df['Type'] = df['Type'].str.lower()
-                df['Type'] = df['Type'].replace({
-                    'loan_disbursement': 'deposit',
-                    'loan_payment': 'withdraw'
-                })
-
-                # Extract month
-                df['Month'] = df['Timestamp'].dt.strftime('%Y-%m')
-
-                # Group and summarize
-                monthly_summary = df.groupby(['Month', 'Type'])['Amount'].sum().unstack(fill_value=0)
-
-                if not monthly_summary.empty:
-                    fig = go.Figure()
-
-                    if 'deposit' in monthly_summary.columns:
-                        fig.add_trace(go.Bar(
-                            x=monthly_summary.index,
-                            y=monthly_summary['deposit'],
-                            name='Deposits',
-                            marker_color='green'
-                        ))
-
-                    if 'withdraw' in monthly_summary.columns:
-                        fig.add_trace(go.Bar(
-                            x=monthly_summary.index,
-                            y=monthly_summary['withdraw'],
-                            name='Withdrawals',
-                            marker_color='red'
-                        ))
-
-                    fig.update_layout(
-                        title='Monthly Transaction Summary',
-                        xaxis_title='Month',
-                        yaxis_title='Amount',
-                        barmode='group'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No monthly trend data available yet")
+def transfer_section():
+    with st.form("transfer_form"):
+        to_acc = st.text_input("To Account No").strip().upper()
+        amt = st.number_input("Amount ₹", min_value=0.01)
+        submitted = st.form_submit_button("Transfer")
+        key = submission_key("transfer_form", submitted)
+        if submitted:
+            success, msg = bs.transfer_money(st.session_state.account_no, to_acc, amt,
+                                             idempotency_key=key)
+            if success:
+                st.session_state.transfer_success = True
+                reset_history()
+                st.session_state.transfer_error = ""
+            else:
+                st.session_state.transfer_error = msg
+                st.session_state.transfer_success = False
+            st.rerun()
+
+    if st.session_state.transfer_success:
+        st.success("Transfer successful")
+        st.session_state.transfer_success = False
+    if st.session_state.transfer_error:
+        st.error(st.session_state.transfer_error)
+        st.session_state.transfer_error = ""
 
+def loans_section():
+    col1, col2 = st.columns(2)
+
+    with col1.form("loan_form"):
+        amt = st.number_input("Loan Amount ₹", min_value=1000.0)
+        months = st.selectbox("Term (months)", [12, 24, 36])
+        rate = st.slider("Interest %", min_value=5.0, max_value=15.0, value=10.0)
+        submitted = st.form_submit_button("Apply")
+        key = submission_key("loan_form", submitted)
+        if submitted:
+            success, msg = bs.apply_for_loan(st.session_state.account_no, amt, months, rate,
+                                             idempotency_key=key)
+            if success:
+                st.session_state.loan_success = True
+                reset_history()
+                st.session_state.loan_error = ""
+            else:
+                st.session_state.loan_error = msg
+                st.session_state.loan_success = False
+            st.rerun()
+
+    if st.session_state.loan_success:
+        st.success("Loan application successful")
+        st.session_state.loan_success = False
+    if st.session_state.loan_error:
+        st.error(st.session_state.loan_error)
+        st.session_state.loan_error = ""
 
+    with col2:
+        loans = prefetched("loans")
+        if loans is None:
+            loans = bs.get_active_loans(st.session_state.account_no)
+        for loan in loans:
+            with st.expander(f"Loan ₹{loan['amount']}"):
+                st.write(f"Monthly: ₹{loan['monthly_payment']:.2f}")
+                st.write(f"Remaining: ₹{loan['remaining_amount']:.2f}")
+
+                form_key = f"pay_loan_{loan['loan_id']}"
+                with st.form(form_key):
+                    pay_amt = st.number_input(
+                        "Pay Amount ₹",
+                        min_value=0.01,
+                        max_value=loan["remaining_amount"],
+                        key=f"pay_amt_{loan['loan_id']}"
+                    )
+                    submitted = st.form_submit_button("Pay")
+                    key = submission_key(form_key, submitted)
+                    if submitted:
+                        success, msg = bs.make_loan_payment(loan["loan_id"], pay_amt,
+                                                            idempotency_key=key)
+                        # Store flags in dict by loan_id
+                        st.session_state.loan_pay_success[loan['loan_id']] = success
+                        if not success:
+                            st.session_state.loan_pay_error[loan['loan_id']] = msg
+                        else:
+                            st.session_state.loan_pay_error[loan['loan_id']] = ""
+                            reset_history()
+                        st.rerun()
+
+                # Show messages for each loan payment
+                if st.session_state.loan_pay_success.get(loan['loan_id'], False):
+                    st.success("Loan payment successful")
+                    st.session_state.loan_pay_success[loan['loan_id']] = False
+                if st.session_state.loan_pay_error.get(loan['loan_id'], ""):
+                    st.error(st.session_state.loan_pay_error[loan['loan_id']])
+                    st.session_state.loan_pay_error[loan['loan_id']] = ""
+
+def history_section():
+    # With listeners on, any change to the account reloads the first page,
+    # which then comes from its live view rather than a query
+    version = bs.watch_account(st.session_state.account_no).version if bs.listeners else None
+    if st.session_state.get("history", {}).get("version") != version:
+        st.session_state.pop("history", None)
+    if 'history' not in st.session_state:
+        txns, cursor = bs.get_transaction_history_page(st.session_state.account_no, HISTORY_PAGE_SIZE)
+        st.session_state.history = {"transactions": txns, "cursor": cursor, "version": version}
+    history = st.session_state.history
+    transactions = history["transactions"]
+
+    if transactions:
+        import analytics
+        import plotly.express as px
+        import plotly.graph_objects as go
+
+        # The loaded pages only feed the table; the charts summarize the whole
+        # history below
+        table = analytics.transactions_frame(transactions)
+
+        tab1, tab2, tab3 = st.tabs([
+            "Transaction History",
+            "Category Analysis",
+            "Monthly Trends"
+        ])
+
+        with tab1:
+            st.dataframe(table)
+
+            if history["cursor"] is not None and st.button("Load more"):
+                txns, cursor = bs.get_transaction_history_page(
+                    st.session_state.account_no, HISTORY_PAGE_SIZE, history["cursor"]
+                )
+                history["transactions"] = transactions + txns
+                history["cursor"] = cursor
+                st.rerun()
 
+        # Charts read the pre-aggregated rollup, not the loaded pages; if it
+        # cannot be read they are computed from the full history, fetched as
+        # compact columns
+        rollup = prefetched("rollup") or bs.get_rollup(st.session_state.account_no)
+        if rollup:
+            expenses_by_category, monthly_summary = analytics.summarize_rollup(rollup)
         else:
-            st.info("No transactions found.")
+            columns = bs.get_transaction_columns(st.session_state.account_no)
+            _, expenses_by_category, monthly_summary = analytics.summarize_transactions(columns.to_frame())
+
+        with tab2:
+            if not expenses_by_category.empty:
+                fig = px.pie(
+                    values=expenses_by_category.values,
+                    names=expenses_by_category.index,
+                    title='Expenses by Category'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No expense data available yet")
+
+        with tab3:
+            if not monthly_summary.empty:
+                fig = go.Figure()
+
+                if 'deposit' in monthly_summary.columns:
+                    fig.add_trace(go.Bar(
+                        x=monthly_summary.index,
+                        y=monthly_summary['deposit'],
+                        name='Deposits',
+                        marker_color='green'
+                    ))
+
+                if 'withdraw' in monthly_summary.columns:
+                    fig.add_trace(go.Bar(
+                        x=monthly_summary.index,
+                        y=monthly_summary['withdraw'],
+                        name='Withdrawals',
+                        marker_color='red'
+                    ))
+
+                fig.update_layout(
+                    title='Monthly Transaction Summary',
+                    xaxis_title='Month',
+                    yaxis_title='Amount',
+                    barmode='group'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No monthly trend data available yet")
 
 
 
+    else:
+        st.info("No transactions found.")
+
+SECTIONS = {
+    "Deposit / Withdraw": deposit_withdraw_section,
+    "Transfer": transfer_section,
+    "Loans": loans_section,
+    "History": history_section,
+}
+
 if __name__ == "__main__":
     if not st.session_state.logged_in:
         login_screen()
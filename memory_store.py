@@ -0,0 +1,506 @@
+# memory_store.py
+# In-process stand-in for the subset of the Firestore client API used by
+# BankingSystem, so the app and benchmarks can run without a live project.
+import copy
+import enum
+import logging
+import queue
+import os
+import threading
+import time
+import uuid
+from collections.abc import Hashable
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Same names as google.api_core.exceptions, without importing it
+class AlreadyExists(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+# Transient errors. The store never raises them; they exist so retry paths
+# can be exercised against it
+class ServiceUnavailable(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+}
+
+
+class MemoryClient:
+    def __init__(self):
+        self._collections = {}
+        # (collection, field) -> {value: set of doc ids}, built the first time
+        # a query filters on field with "==" and maintained by every commit
+        self._indexes = {}
+        self._lock = threading.RLock()
+        # on_snapshot listeners, refreshed by one dispatcher thread after the
+        # commits that touch their collection (Firestore also calls them back
+        # on its own thread)
+        self._watches = []
+        self._pending = queue.Queue()
+        self._dispatcher = None
+        # Simulated network latency per round trip, in seconds, so benchmarks
+        # can show the effect of overlapping or saving round trips
+        self.latency = float(os.environ.get("BANKING_MEMORY_LATENCY_MS", 0)) / 1000
+        self.reset_stats()
+
+    # Counts what the same calls would cost against Firestore: documents read
+    # and written, queries run and network round trips.
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"reads": 0, "writes": 0, "queries": 0, "round_trips": 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                self._stats[name] += n
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name):
+        return MemoryCollection(self, name)
+
+    def _docs(self, collection):
+        return self._collections.setdefault(collection, {})
+
+    def _read(self, collection, doc_id):
+        with self._lock:
+            data = self._docs(collection).get(doc_id)
+            return copy.deepcopy(data)
+
+    def _commit(self, writes):
+        self._round_trip()
+        # Stage every write first so a failing update leaves the store untouched
+        with self._lock:
+            staged = {}
+            for op, collection, doc_id, data in writes:
+                key = (collection, doc_id)
+                current = staged[key] if key in staged else self._read(collection, doc_id)
+                if op == "update":
+                    if current is None:
+                        raise NotFound(f"No document to update: {collection}/{doc_id}")
+                    staged[key] = _apply(current, data)
+                elif op == "create":
+                    if current is not None:
+                        raise AlreadyExists(f"Document already exists: {collection}/{doc_id}")
+                    staged[key] = _apply({}, data)
+                elif op == "merge":
+                    staged[key] = _apply(current or {}, data, merge=True)
+                else:
+                    staged[key] = _apply({}, data)
+            for (collection, doc_id), data in staged.items():
+                docs = self._docs(collection)
+                for (indexed_collection, field), index in self._indexes.items():
+                    if indexed_collection == collection:
+                        _unindex(index, field, doc_id, docs.get(doc_id))
+                        _index(index, field, doc_id, data)
+                docs[doc_id] = data
+            self._count(writes=len(writes), round_trips=1)
+            if self._watches:
+                self._pending.put({collection for collection, _ in staged})
+
+    def _equal_ids(self, collection, field, value):
+        index = self._indexes.get((collection, field))
+        if index is None:
+            index = {}
+            for doc_id, data in self._docs(collection).items():
+                _index(index, field, doc_id, data)
+            self._indexes[(collection, field)] = index
+        return index.get(value, ())
+
+    def _watch(self, collection, snapshots, callback):
+        watch = Watch(self, collection, snapshots, callback)
+        with self._lock:
+            self._watches.append(watch)
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="memory-store-watch", daemon=True
+                )
+                self._dispatcher.start()
+        # The first callback delivers the current state
+        self._pending.put(watch)
+        return watch
+
+    def _dispatch(self):
+        while True:
+            item = self._pending.get()
+            if isinstance(item, Watch):
+                watches = [item]
+            else:
+                with self._lock:
+                    watches = [w for w in self._watches if w.collection in item]
+            for watch in watches:
+                watch._refresh()
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._round_trip()
+        self._count(reads=len(references), round_trips=1)
+        for ref in references:
+            yield DocumentSnapshot(ref, _project(self._read(ref._collection, ref.id), field_paths))
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def transaction(self):
+        return MemoryTransaction(self)
+
+
+def _index(index, field, doc_id, data):
+    if data is not None and field in data and isinstance(data[field], Hashable):
+        index.setdefault(data[field], set()).add(doc_id)
+
+
+def _unindex(index, field, doc_id, data):
+    if data is not None and field in data and isinstance(data[field], Hashable):
+        index.get(data[field], set()).discard(doc_id)
+
+
+# Like a Firestore field mask: only the listed (dotted) field paths are kept
+def _project(data, field_paths):
+    if data is None or field_paths is None:
+        return data
+    result = {}
+    for path in field_paths:
+        source, target = data, result
+        *parents, leaf = path.split(".")
+        for part in parents:
+            if not isinstance(source.get(part), dict):
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return result
+
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+def _apply(current, data, merge=False):
+    result = copy.deepcopy(current)
+    for field, value in data.items():
+        if isinstance(value, Increment):
+            result[field] = result.get(field, 0) + value.value
+        elif merge and isinstance(value, dict):
+            existing = result.get(field)
+            result[field] = _apply(existing if isinstance(existing, dict) else {}, value, merge=True)
+        else:
+            result[field] = copy.deepcopy(value)
+    return result
+
+
+class MemoryWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        op = "merge" if merge else "set"
+        self._writes.append((op, reference._collection, reference.id, data))
+
+    def create(self, reference, data):
+        self._writes.append(("create", reference._collection, reference.id, data))
+
+    def update(self, reference, data):
+        self._writes.append(("update", reference._collection, reference.id, data))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    # Writes are buffered and applied together when the transactional function
+    # returns; the client lock is held throughout, so transactions serialize.
+    def get_all(self, references, field_paths=None):
+        return self._client.get_all(references, field_paths)
+
+    def _begin(self):
+        # BeginTransaction is its own round trip in Firestore
+        self._client._round_trip()
+        self._client._count(round_trips=1)
+
+    def _commit(self):
+        self.commit()
+
+
+def transactional(func):
+    def wrapper(transaction, *args, **kwargs):
+        with transaction._client._lock:
+            transaction._begin()
+            try:
+                result = func(transaction, *args, **kwargs)
+            except Exception:
+                transaction._writes = []
+                raise
+            transaction._commit()
+            return result
+    return wrapper
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class DocumentChange:
+    def __init__(self, type, document):
+        self.type = type
+        self.document = document
+
+
+class Watch:
+    # Calls callback(snapshots, changes, read_time) with the target's current
+    # snapshots whenever a commit changes them, like Firestore's on_snapshot
+    def __init__(self, client, collection, snapshots, callback):
+        self._client = client
+        self.collection = collection
+        self._snapshots = snapshots
+        self._callback = callback
+        self._seen = None
+        self._active = True
+
+    def _refresh(self):
+        if not self._active:
+            return
+        snapshots = self._snapshots()
+        current = {snapshot.id: snapshot for snapshot in snapshots if snapshot.exists}
+        previous = self._seen or {}
+        changes = [
+            DocumentChange(ChangeType.ADDED if doc_id not in previous else ChangeType.MODIFIED, snapshot)
+            for doc_id, snapshot in current.items()
+            if doc_id not in previous or previous[doc_id]._data != snapshot._data
+        ]
+        changes += [
+            DocumentChange(ChangeType.REMOVED, snapshot)
+            for doc_id, snapshot in previous.items() if doc_id not in current
+        ]
+        first, self._seen = self._seen is None, current
+        if not changes and not first:
+            return
+        # Listeners are billed a read per added or changed document
+        self._client._count(reads=max(len(changes), 1))
+        try:
+            self._callback(snapshots, changes, datetime.now(timezone.utc))
+        except Exception:
+            logger.exception("on_snapshot callback failed")
+
+    def unsubscribe(self):
+        self._active = False
+        with self._client._lock:
+            if self in self._client._watches:
+                self._client._watches.remove(self)
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field):
+        return self._data[field]
+
+
+class MemoryDocument:
+    def __init__(self, client, collection, doc_id):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self, field_paths=None, transaction=None):
+        self._client._round_trip()
+        self._client._count(reads=1, round_trips=1)
+        return DocumentSnapshot(self, _project(self._client._read(self._collection, self.id), field_paths))
+
+    def set(self, data, merge=False):
+        op = "merge" if merge else "set"
+        self._client._commit([(op, self._collection, self.id, data)])
+
+    def create(self, data):
+        self._client._commit([("create", self._collection, self.id, data)])
+
+    def update(self, data):
+        self._client._commit([("update", self._collection, self.id, data)])
+
+    def on_snapshot(self, callback):
+        def snapshots():
+            return [DocumentSnapshot(self, self._client._read(self._collection, self.id))]
+        return self._client._watch(self._collection, snapshots, callback)
+
+
+class MemoryQuery:
+    def __init__(self, client, collection, filters=(), orders=(), limit=None, cursor=None,
+                 projection=None):
+        self._client = client
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes):
+        params = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "cursor": self._cursor,
+            "projection": self._projection,
+        }
+        params.update(changes)
+        return MemoryQuery(self._client, self._collection, **params)
+
+    def where(self, field, op, value):
+        if op not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction=Query.ASCENDING):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        # Accepts a snapshot (ordered fields plus document id) or a dict of field values
+        if isinstance(document_fields_or_snapshot, DocumentSnapshot):
+            cursor = (document_fields_or_snapshot.id, document_fields_or_snapshot.to_dict())
+        else:
+            cursor = (None, document_fields_or_snapshot)
+        return self._copy(cursor=cursor)
+
+    def _compare(self, a, b):
+        # Like Firestore, ties are broken by document id in the direction of the last ordering
+        last_direction = self._orders[-1][1] if self._orders else Query.ASCENDING
+        for field, direction in self._orders + (("__name__", last_direction),):
+            if field == "__name__":
+                if a[0] is None or b[0] is None:
+                    return 0
+                x, y = a[0], b[0]
+            else:
+                x, y = a[1][field], b[1][field]
+            if x != y:
+                result = -1 if x < y else 1
+                return -result if direction == Query.DESCENDING else result
+        return 0
+
+    def _matches(self):
+        # Like Firestore, documents missing a filtered or ordered field are excluded
+        fields = [f for f, _, _ in self._filters] + [f for f, _ in self._orders]
+        # Commits replace document dicts rather than mutate them, so matched
+        # dicts can be shared with snapshots (to_dict() hands out copies).
+        with self._client._lock:
+            docs = self._client._docs(self._collection)
+            candidates = docs.keys()
+            filters = list(self._filters)
+            for i, (field, op, value) in enumerate(filters):
+                if op == "==" and isinstance(value, Hashable):
+                    candidates = self._client._equal_ids(self._collection, field, value)
+                    del filters[i]
+                    break
+            filters = [(field, _OPERATORS[op], value) for field, op, value in filters]
+            matches = []
+            for doc_id in candidates:
+                data = docs[doc_id]
+                if all(f in data for f in fields) and all(op(data[f], value) for f, op, value in filters):
+                    matches.append((doc_id, data))
+        # Stable sorts, least significant key first; ties fall back to document id
+        last_direction = self._orders[-1][1] if self._orders else Query.ASCENDING
+        matches.sort(key=lambda item: item[0], reverse=last_direction == Query.DESCENDING)
+        for field, direction in reversed(self._orders):
+            matches.sort(key=lambda item: item[1][field], reverse=direction == Query.DESCENDING)
+        if self._cursor is not None:
+            matches = [item for item in matches if self._compare(item, self._cursor) > 0]
+        if self._limit is not None:
+            matches = matches[:self._limit]
+        return [
+            DocumentSnapshot(MemoryDocument(self._client, self._collection, doc_id),
+                             _project(data, self._projection))
+            for doc_id, data in matches
+        ]
+
+    def stream(self, transaction=None):
+        self._client._round_trip()
+        matches = self._matches()
+        # Firestore bills at least one read per query
+        self._client._count(queries=1, round_trips=1, reads=max(len(matches), 1))
+        yield from matches
+
+    def on_snapshot(self, callback):
+        return self._client._watch(self._collection, self._matches, callback)
+
+
+class MemoryCollection(MemoryQuery):
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, doc_id=None):
+        return MemoryDocument(self._client, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def client():
+    # One shared store per process, mirroring firestore.client() for the default app
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = MemoryClient()
+        return _default_client
@@ -0,0 +1,205 @@
+# metrics.py
+# Per-method call metrics for BankingSystem: wall time, plus the Firestore
+# reads, writes, queries, round trips and document bytes each call caused.
+# Methods are wrapped with @instrumented; the client is wrapped in
+# CountingClient, which charges every storage call to the innermost
+# instrumented method running in the current context. Work a method hands to
+# worker threads is charged to it when submitted with submit().
+import contextvars
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNTERS = ("reads", "writes", "queries", "round_trips", "bytes_read", "bytes_written")
+
+# Counters of the innermost instrumented call. Worker threads running with a
+# copy of the caller's context share its frame, hence the lock.
+_frame = contextvars.ContextVar("metrics_frame", default=None)
+_frame_lock = threading.Lock()
+
+
+def _charge(**counts):
+    frame = _frame.get()
+    if frame is not None:
+        with _frame_lock:
+            for name, n in counts.items():
+                frame[name] += n
+
+
+# executor.submit(fn, *args), with fn running in a copy of the caller's
+# context so the storage calls it makes are charged to the calling method
+def submit(executor, fn, *args):
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+# Approximates Firestore's storage size rules for a document's fields
+def document_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode()) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k).encode()) + 1 + document_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(document_size(v) for v in value)
+    # Sentinels such as Increment are sent as small transforms
+    return 8
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def _entry(self, method):
+        if method not in self._methods:
+            self._methods[method] = {
+                "calls": 0,
+                "errors": 0,
+                "duration_sum": 0.0,
+                "duration_buckets": [0] * len(DURATION_BUCKETS),
+                **{name: 0 for name in COUNTERS},
+            }
+        return self._methods[method]
+
+    def record(self, method, duration, counts, error=False):
+        with self._lock:
+            entry = self._entry(method)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["duration_sum"] += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    entry["duration_buckets"][i] += 1
+            for name in COUNTERS:
+                entry[name] += counts[name]
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._methods))
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump({"buckets": DURATION_BUCKETS, "methods": self.snapshot()}, f, indent=2)
+
+    def render_prometheus(self):
+        lines = [
+            "# TYPE banking_calls_total counter",
+            "# TYPE banking_errors_total counter",
+            "# TYPE banking_call_duration_seconds histogram",
+        ]
+        lines += [f"# TYPE banking_firestore_{name}_total counter" for name in COUNTERS]
+        for method, entry in sorted(self.snapshot().items()):
+            label = f'method="{method}"'
+            lines.append(f"banking_calls_total{{{label}}} {entry['calls']}")
+            lines.append(f"banking_errors_total{{{label}}} {entry['errors']}")
+            for bound, count in zip(DURATION_BUCKETS, entry["duration_buckets"]):
+                lines.append(f'banking_call_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'banking_call_duration_seconds_bucket{{{label},le="+Inf"}} {entry["calls"]}')
+            lines.append(f"banking_call_duration_seconds_sum{{{label}}} {entry['duration_sum']}")
+            lines.append(f"banking_call_duration_seconds_count{{{label}}} {entry['calls']}")
+            for name in COUNTERS:
+                lines.append(f"banking_firestore_{name}_total{{{label}}} {entry[name]}")
+        return "\n".join(lines) + "\n"
+
+
+def instrumented(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = getattr(self, "metrics", None)
+        if metrics is None:
+            return func(self, *args, **kwargs)
+        parent = _frame.get()
+        counts = dict.fromkeys(COUNTERS, 0)
+        token = _frame.set(counts)
+        start = time.perf_counter()
+        error = False
+        try:
+            return func(self, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            _frame.reset(token)
+            with _frame_lock:
+                counts = dict(counts)
+            metrics.record(func.__name__, duration, counts, error)
+            # Nested instrumented calls also count towards their caller
+            _charge(**counts)
+    return wrapper
+
+
+def _unwrap(value):
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value._target if isinstance(value, _Counted) else value
+
+
+def _counted_snapshots(snapshots, query=False):
+    if query:
+        _charge(queries=1, round_trips=1)
+    else:
+        _charge(round_trips=1)
+    for snapshot in snapshots:
+        _charge(reads=1, bytes_read=document_size(snapshot.to_dict() or {}))
+        yield snapshot
+
+
+# Calls that send their payload in a later commit, not a round trip of their own
+_BUFFERED_WRITES = {"set", "update", "create", "delete"}
+
+
+class _Counted:
+    def __init__(self, target):
+        object.__setattr__(self, "_target", target)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            args = [_unwrap(a) for a in args]
+            kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+            result = attr(*args, **kwargs)
+            return self._account(name, args, result)
+        return call
+
+    def _account(self, name, args, result):
+        is_writer = hasattr(self._target, "commit") or hasattr(self._target, "_commit")
+        if name in ("stream", "get_all"):
+            return _counted_snapshots(result, query=name == "stream")
+        if name == "get" and hasattr(self._target, "stream"):
+            return list(_counted_snapshots(result, query=True))
+        if name == "get":
+            _charge(reads=1, round_trips=1, bytes_read=document_size(result.to_dict() or {}))
+        elif name in _BUFFERED_WRITES and is_writer:
+            data = args[1] if len(args) > 1 else {}
+            _charge(writes=1, bytes_written=document_size(data))
+        elif name in _BUFFERED_WRITES or name == "add":
+            data = args[0] if args else {}
+            _charge(writes=1, round_trips=1, bytes_written=document_size(data))
+        elif name in ("commit", "_commit", "_begin"):
+            _charge(round_trips=1)
+        if hasattr(result, "set") or hasattr(result, "stream"):
+            return _Counted(result)
+        return result
+
+
+class CountingClient(_Counted):
+    pass
@@ -0,0 +1,96 @@
+# passwords.py
+# Salted password hashing with the cost parameters stored next to the hash:
+#   scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>
+#   pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+# Bare 64-character hex digests are legacy unsalted SHA-256 hashes; they still
+# verify but are reported as needing a rehash so logins can upgrade them.
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_METHOD = os.environ.get("BANKING_PASSWORD_HASH", "scrypt")
+SCRYPT_N = int(os.environ.get("BANKING_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get("BANKING_PBKDF2_ITERATIONS", 600_000))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=32)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def hash_password(password, method=None, scrypt_n=None, pbkdf2_iterations=None):
+    method = method or DEFAULT_METHOD
+    salt = os.urandom(16)
+    if method == "scrypt":
+        n = scrypt_n or SCRYPT_N
+        digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    if method == "pbkdf2_sha256":
+        iterations = pbkdf2_iterations or PBKDF2_ITERATIONS
+        digest = _pbkdf2(password, salt, iterations)
+        return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+    raise ValueError(f"Unknown password hash method: {method}")
+
+
+# Returns (matches, needs_rehash)
+def verify_password(password, stored):
+    parts = stored.split("$")
+    if parts[0] == "scrypt" and len(parts) == 6:
+        n, r, p = (int(x) for x in parts[1:4])
+        digest = _scrypt(password, bytes.fromhex(parts[4]), n, r, p)
+        current = DEFAULT_METHOD == "scrypt" and (n, r, p) == (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+        iterations = int(parts[1])
+        digest = _pbkdf2(password, bytes.fromhex(parts[2]), iterations)
+        current = DEFAULT_METHOD == "pbkdf2_sha256" and iterations == PBKDF2_ITERATIONS
+    else:
+        digest = hashlib.sha256(password.encode()).digest()
+        parts = [stored]
+        current = False
+    matches = hmac.compare_digest(digest.hex(), parts[-1])
+    return matches, matches and not current
+
+
+class PasswordHasher:
+    # Runs hashing on a bounded thread pool. hashlib.scrypt and pbkdf2_hmac
+    # release the GIL, so the workers use every core, and the pool caps how
+    # many hashes run at once (each scrypt holds 16 MB). Threads rather than
+    # processes: spawned workers would re-run the Streamlit script as their
+    # __main__, and one dead worker breaks a process pool for good.
+    # workers=0 hashes inline in the calling thread.
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = int(os.environ.get("BANKING_PASSWORD_WORKERS", os.cpu_count() or 1))
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _submit(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._pool.submit(func, *args).result()
+
+    def hash(self, password):
+        return self._submit(hash_password, password)
+
+    def verify(self, password, stored):
+        return self._submit(verify_password, password, stored)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
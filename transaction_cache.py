@@ -0,0 +1,96 @@
+# transaction_cache.py
+# On-disk SQLite cache of ledger entries per account. Ledger entries are never
+# modified once written, so after the first full fetch an account only needs
+# the entries at or after its high-water mark (the newest timestamp seen),
+# less an overlap window that catches entries committed late with an older
+# timestamp. Entries are keyed by document id, so refetched ones replace
+# themselves instead of duplicating.
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+class TransactionCache:
+    def __init__(self, path, overlap=60.0):
+        self.path = path
+        self.overlap = overlap
+        self._lock = threading.Lock()
+        # One connection shared by every session thread, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                " doc_id TEXT PRIMARY KEY, account_no TEXT NOT NULL,"
+                " timestamp TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_by_account"
+                " ON transactions (account_no, timestamp DESC, doc_id DESC)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " account_no TEXT PRIMARY KEY, high_water_mark TEXT)"
+            )
+
+    # None if the account was never synced (fetch everything), else the
+    # timestamp to fetch from ("" when the account had no entries yet)
+    def sync_from(self, account_no):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water_mark FROM sync_state WHERE account_no = ?", (account_no,)
+            ).fetchone()
+        if row is None:
+            return None
+        if not row[0]:
+            return ""
+        return (datetime.fromisoformat(row[0]) - timedelta(seconds=self.overlap)).isoformat()
+
+    # Stores fetched (doc_id, data) entries and advances the high-water mark
+    def add(self, account_no, entries):
+        rows = [
+            (doc_id, account_no, data["timestamp"], json.dumps(data, default=str))
+            for doc_id, data in entries if data.get("timestamp")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO transactions (doc_id, account_no, timestamp, data)"
+                " VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (account_no, high_water_mark)"
+                " SELECT ?, MAX(timestamp) FROM transactions WHERE account_no = ?",
+                (account_no, account_no)
+            )
+        return len(rows)
+
+    # Newest first, like the history query. The cursor is the (timestamp,
+    # doc_id) of the last entry returned, None once there are no more.
+    def page(self, account_no, limit=None, cursor=None):
+        sql = "SELECT timestamp, doc_id, data FROM transactions WHERE account_no = ?"
+        params = [account_no]
+        if cursor is not None:
+            sql += " AND (timestamp < ? OR (timestamp = ? AND doc_id < ?))"
+            params += [cursor[0], cursor[0], cursor[1]]
+        sql += " ORDER BY timestamp DESC, doc_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = rows[-1][:2] if limit is not None and len(rows) == limit else None
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+    def clear(self, account_no=None):
+        with self._lock, self._conn:
+            if account_no is None:
+                self._conn.execute("DELETE FROM transactions")
+                self._conn.execute("DELETE FROM sync_state")
+            else:
+                self._conn.execute("DELETE FROM transactions WHERE account_no = ?", (account_no,))
+                self._conn.execute("DELETE FROM sync_state WHERE account_no = ?", (account_no,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()